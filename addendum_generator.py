@@ -1,8 +1,16 @@
 import os
-from datetime import datetime
+import re
+import json
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
 from fpdf import FPDF
 import plotly.graph_objects as go
 from PyPDF2 import PdfMerger
+from playbook_document import build_playbook_document, ordinal, histogram_rows
 
 # MESH Brand Colors
 MESH_BURGUNDY = (80, 20, 30)      # Primary headings
@@ -21,6 +29,11 @@ class MESHBrandedPDF(FPDF):
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.logo_path = os.path.join(base_dir, 'branding', 'mesh-logo.png')
         
+        # Register fonts in a fixed order so font resource names (/F1, /F2...)
+        # are identical in every document and recorded fragments can be reused
+        for style in ('', 'B', 'I'):
+            self.set_font('Arial', style)
+        
     def header(self):
         # Add MESH logo in top left corner on all pages
         if os.path.exists(self.logo_path):
@@ -113,6 +126,153 @@ class MESHBrandedPDF(FPDF):
         
         self.ln(box_height - (self.get_y() - box_y) + 5)
         self.set_line_width(0.2)  # Reset line width
+    
+    def record_fragment(self, draw):
+        """Run draw(self) and return the content stream it produced plus its height"""
+        self.font_family = ''  # Force draw() to emit its own font selection
+        contents = self.pages[self.page].contents
+        start_y = self.get_y()
+        start = len(contents)
+        draw(self)
+        fragment = {
+            'stream': bytes(contents[start:]),
+            'origin': start_y,
+            'height': self.get_y() - start_y
+        }
+        del contents[start:]
+        self.set_xy(self.l_margin, start_y)
+        return fragment
+    
+    def place_fragment(self, fragment):
+        """Draw a recorded fragment at the current position"""
+        y = self.get_y()
+        offset = (fragment['origin'] - y) * self.k
+        # Graphics state is saved so the fragment cannot leak fonts or colors
+        self._out(f'q 0 g 1 0 0 1 0 {offset:.2f} cm')
+        self._out(fragment['stream'])
+        self._out('Q')
+        self.set_xy(self.l_margin, y + fragment['height'])
+
+    def append_section(self, section):
+        """Append page bodies rendered by MESHSectionPDF, drawing header and footer here"""
+        image_names = {}
+        for path, index in section['images']:
+            image_names[index] = self.preload_image(path)[2]['i']
+        
+        for body in section['pages']:
+            self.add_page()
+            if image_names:
+                body = IMAGE_REFERENCE.sub(lambda m: rename_image(m, image_names), body)
+            # Bodies expect the default graphics state of a fresh page
+            self._out('q 0 g 0 G')
+            self._out(body)
+            self._out('Q')
+
+# Images are drawn outside literal strings. Strings are matched only so that
+# text such as "see /I9 Do" is left alone; fpdf escapes parentheses inside them.
+IMAGE_REFERENCE = re.compile(rb'\((?:\\.|[^\\)])*+\)|/I(\d+) Do', re.S)
+
+def rename_image(match, image_names):
+    """Replacement for IMAGE_REFERENCE: the section's image under this document's name"""
+    index = match.group(1)
+    if index is None or int(index) not in image_names:
+        return match.group(0)
+    return b'/I%d Do' % image_names[int(index)]
+
+class MESHSectionPDF(MESHBrandedPDF):
+    """Renders page bodies only; headers and footers are added by append_section"""
+    
+    def header(self):
+        # Same cursor movement as MESHBrandedPDF.header on pages after the cover
+        self.set_xy(150, 10)
+        self.ln(15)
+    
+    def footer(self):
+        pass
+    
+    def rendered_section(self):
+        return {
+            'pages': [bytes(self.pages[n].contents) for n in range(1, self.page + 1)],
+            'images': [(name, info['i']) for name, info in self.images.items()]
+        }
+
+# Pre-rendered tool cards shared across customers, keyed by the tool's static fields
+TOOL_CARD_CACHE_SIZE = 512
+_tool_card_cache = {}
+_tool_card_lock = threading.Lock()
+_tool_card_scratch = None
+
+def tool_card_key(tool):
+    """Hash the fields of a tool that are the same for every customer"""
+    static = {
+        'name': tool.get('name', 'Tool'),
+        'category': tool.get('category', 'N/A'),
+        'keyFeatures': tool.get('keyFeatures', [])[:5],
+        'pricing': tool.get('pricing', []),
+        'website': tool.get('website', '')
+    }
+    return hashlib.sha256(json.dumps(static, sort_keys=True).encode('utf-8')).hexdigest()
+
+def draw_tool_card_head(pdf, tool):
+    # Tool name with orange accent
+    pdf.set_font('Arial', 'B', 13)
+    pdf.set_text_color(*MESH_ORANGE)
+    pdf.cell(0, 7, f'{tool.get("name", "Tool")}', 0, 1)
+
+def draw_tool_card_tail(pdf, tool):
+    # Key features
+    if tool.get('keyFeatures'):
+        pdf.set_font('Arial', 'B', 10)
+        pdf.set_text_color(*MESH_DARK_RED)
+        pdf.cell(0, 5, 'Key Features:', 0, 1)
+        pdf.set_font('Arial', '', 10)
+        pdf.set_text_color(*MESH_BLACK)
+        for feature in tool.get('keyFeatures', [])[:5]:
+            pdf.bullet_point(feature, indent=3)
+        pdf.ln(1)
+    
+    # Pricing
+    if tool.get('pricing'):
+        pdf.set_font('Arial', 'B', 10)
+        pdf.set_text_color(*MESH_DARK_RED)
+        pdf.cell(0, 5, 'Pricing:', 0, 1)
+        pdf.set_font('Arial', '', 10)
+        pdf.set_text_color(*MESH_BLACK)
+        for price in tool.get('pricing', []):
+            pdf.bullet_point(price, indent=3)
+        pdf.ln(1)
+    
+    # Website
+    if tool.get('website'):
+        pdf.set_font('Arial', 'I', 9)
+        pdf.set_text_color(*MESH_ORANGE)
+        pdf.cell(0, 5, f'Website: {tool.get("website")}', 0, 1)
+    pdf.set_text_color(*MESH_BLACK)
+
+def get_tool_card(tool):
+    """Return the cached head/tail fragments for a tool, rendering them on a miss"""
+    global _tool_card_scratch
+    key = tool_card_key(tool)
+    with _tool_card_lock:
+        card = _tool_card_cache.get(key)
+        if card is not None:
+            return card
+        
+        if _tool_card_scratch is None:
+            _tool_card_scratch = MESHBrandedPDF('')
+            _tool_card_scratch.set_auto_page_break(auto=False)
+            _tool_card_scratch.add_page()
+        scratch = _tool_card_scratch
+        scratch.set_xy(scratch.l_margin, scratch.t_margin)
+        card = {
+            'head': scratch.record_fragment(lambda pdf: draw_tool_card_head(pdf, tool)),
+            'tail': scratch.record_fragment(lambda pdf: draw_tool_card_tail(pdf, tool))
+        }
+        
+        if len(_tool_card_cache) >= TOOL_CARD_CACHE_SIZE:
+            _tool_card_cache.pop(next(iter(_tool_card_cache)))
+        _tool_card_cache[key] = card
+        return card
 
 def create_mesh_branded_chart(dimension_scores):
     """Create radar chart with MESH brand colors"""
@@ -158,37 +318,147 @@ def create_mesh_branded_chart(dimension_scores):
     fig.write_image(chart_path)
     return chart_path
 
-def generate_mesh_branded_addendum(session_data):
-    """Generate MESH-branded custom addendum"""
-    
-    company_name = session_data.get('companyName', 'Your Company')
-    readiness = session_data.get('readiness', {})
-    toolbox = session_data.get('toolbox', {})
-    strategic = session_data.get('strategic', {})
-    
-    # Extract data
-    overall_score = readiness.get('overallScore', 0)
-    maturity_level = readiness.get('maturityLevel', 'Exploring')
-    maturity_desc = readiness.get('maturityDescription', '')
-    dimension_scores = readiness.get('dimensionScores', {})
-    dimension_details = readiness.get('dimensionDetails', {})
-    recommendations = readiness.get('recommendations', {})
-    
-    industry = toolbox.get('industry', 'N/A')
-    company_size = toolbox.get('companySize', 'N/A')
-    budget = toolbox.get('budgetRange', 'N/A')
-    implementation_guidance = toolbox.get('implementationGuidance', '')
-    recommended_tools = toolbox.get('recommendedTools', [])
-    next_steps = toolbox.get('nextSteps', [])
-    
-    timeline = strategic.get('timeline', 'Standard (3-6 months)')
-    primary_driver = strategic.get('primaryDriver', 'Improve operations')
+def generate_mesh_branded_addendum(session_data, clock=None):
+    """Generate MESH-branded custom addendum.
+
+    With a clock, the cover date and the PDF creation date both come from
+    it, and the same inputs always render to the same bytes.
+    """
+    if clock is None:
+        return render_playbook_pdf(build_playbook_document(session_data))
+    created = clock()
+    document = build_playbook_document(session_data, clock=lambda: created)
+    return render_playbook_pdf(document, created=created)
+
+def day_clock():
+    """Clock for reproducible renders: midnight UTC of the current day"""
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def pdf_date(moment):
+    """D:YYYYMMDDHHmmSS+HH'mm' as used in PDF metadata; naive datetimes count as UTC"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    offset = moment.strftime('%z')
+    return f"D:{moment.strftime('%Y%m%d%H%M%S')}{offset[:3]}'{offset[3:]}'"
+
+# Large addenda are rendered as independent sections in a process pool.
+# Each gunicorn worker starts its own pool, so the default stays small.
+# Charts are drawn in the parent, so pool processes never start Kaleido.
+RENDER_WORKERS = int(os.environ.get('MESH_RENDER_WORKERS', min(os.cpu_count() or 1, 4)))
+PARALLEL_RENDER_MIN_ITEMS = int(os.environ.get('MESH_PARALLEL_RENDER_MIN_ITEMS', '12'))
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def get_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # A forkserver keeps workers from inheriting the parent's Kaleido process
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['addendum_generator'])
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=context)
+        return _render_pool
+
+def drop_render_pool(pool):
+    """Forget a broken pool so the next parallel render starts a fresh one"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def count_items(blocks):
+    """Number of tool and recommendation blocks, the bulk of a long addendum"""
+    total = 0
+    for block in blocks:
+        if block['type'] in ('tool', 'recommendation'):
+            total += 1
+        total += count_items(block.get('blocks', []))
+    return total
+
+def split_sections(document):
+    """Split chapters into independently renderable sections.
+
+    Each chapter is a section, except that every further priority group of
+    tools after the first becomes its own section starting on a new page.
+    """
+    sections = []
+    for chapter in document['chapters']:
+        section = {'title': chapter['title'], 'blocks': []}
+        sections.append(section)
+        for block in chapter['blocks']:
+            has_tools = block['type'] == 'group' and any(b['type'] == 'tool' for b in block['blocks'])
+            if has_tools and any(b['type'] == 'group' for b in section['blocks']):
+                section = {'title': None, 'blocks': []}
+                sections.append(section)
+            section['blocks'].append(block)
+    return sections
+
+def has_chart(blocks):
+    return any(block['type'] == 'chart' or has_chart(block.get('blocks', [])) for block in blocks)
+
+def with_chart_images(blocks, chart_paths):
+    """Copy of blocks with every chart drawn here and given its image path"""
+    drawn = []
+    for block in blocks:
+        if block['type'] == 'chart':
+            path = create_mesh_branded_chart(block['dimensionScores'])
+            chart_paths.append(path)
+            block = dict(block, path=path)
+        elif block.get('blocks'):
+            block = dict(block, blocks=with_chart_images(block['blocks'], chart_paths))
+        drawn.append(block)
+    return drawn
+
+def render_section(company_name, section):
+    """Render one section's page bodies (runs in a worker process)"""
+    pdf = MESHSectionPDF(company_name)
+    pdf.add_page()
+    if section['title']:
+        pdf.chapter_title(section['title'])
+    chart_paths = []
+    for block in section['blocks']:
+        render_pdf_block(pdf, block, chart_paths)
+    return pdf.rendered_section()
+
+def render_playbook_pdf(document, parallel=None, created=None):
+    """Render a playbook document as a MESH-branded PDF and return its path.
+
+    With parallel=None, documents with at least PARALLEL_RENDER_MIN_ITEMS
+    tools and recommendations are rendered section by section in a process
+    pool and stitched in order; smaller ones render in this process.
+    created fixes the PDF creation date, which fpdf also hashes into the
+    document ID; by default it is the current time. Documents with a
+    created date always get the stitched section layout, rendered in this
+    process when there is no pool or it breaks, so their bytes do not
+    depend on the host's CPU count.
+    """
+    company_name = document['companyName']
+    if parallel is None:
+        items = sum(count_items(chapter['blocks']) for chapter in document['chapters'])
+        parallel = RENDER_WORKERS > 1 and items >= PARALLEL_RENDER_MIN_ITEMS
     
     # Create PDF
     pdf = MESHBrandedPDF(company_name)
-    
-    # Create branded chart
-    chart_path = create_mesh_branded_chart(dimension_scores)
+    chart_paths = []
+    if created is not None:
+        pdf.set_creation_date(created if created.tzinfo else created.replace(tzinfo=timezone.utc))
+    
+    sections = split_sections(document) if parallel or created is not None else None
+    futures = None
+    if parallel:
+        # Start the sections first so they render while the charts and cover are drawn
+        pool = get_render_pool()
+        try:
+            futures = [None if has_chart(section['blocks']) else pool.submit(render_section, company_name, section)
+                       for section in sections]
+            for n, section in enumerate(sections):
+                if futures[n] is None:
+                    sections[n] = dict(section, blocks=with_chart_images(section['blocks'], chart_paths))
+                    futures[n] = pool.submit(render_section, company_name, sections[n])
+        except BrokenProcessPool:
+            drop_render_pool(pool)
+            futures = None
     
     # ===== COVER PAGE =====
     pdf.add_page()
@@ -225,196 +495,118 @@ def generate_mesh_branded_addendum(session_data):
     pdf.cell(0, 5, 'whenwemesh.com', 0, 1, 'C')
     pdf.ln(10)
     pdf.set_font('Arial', 'I', 9)
-    pdf.cell(0, 6, f'Generated: {datetime.now().strftime("%B %d, %Y")}', 0, 1, 'C')
-    
-    # ===== YOUR AI READINESS PROFILE =====
-    pdf.add_page()
-    pdf.chapter_title('Your AI Readiness Profile')
-    
-    # Summary section
-    pdf.set_font('Arial', 'B', 12)
-    pdf.set_text_color(*MESH_DARK_RED)
-    pdf.cell(0, 7, 'Assessment Summary', 0, 1)
-    pdf.ln(2)
-    
-    pdf.set_font('Arial', '', 11)
-    pdf.set_text_color(*MESH_BLACK)
-    pdf.cell(50, 6, 'Overall Score:', 0, 0)
-    pdf.set_font('Arial', 'B', 11)
-    pdf.set_text_color(*MESH_ORANGE)
-    pdf.cell(0, 6, f'{overall_score}/100', 0, 1)
-    
-    pdf.set_font('Arial', '', 11)
-    pdf.set_text_color(*MESH_BLACK)
-    pdf.cell(50, 6, 'Maturity Stage:', 0, 0)
-    pdf.set_font('Arial', 'B', 11)
-    pdf.set_text_color(*MESH_ORANGE)
-    pdf.cell(0, 6, maturity_level, 0, 1)
-    pdf.ln(3)
-    
-    if maturity_desc:
-        pdf.set_font('Arial', 'I', 10)
-        pdf.set_text_color(*MESH_DARK_RED)
-        pdf.multi_cell(0, 5, f'"{maturity_desc}"')
-        pdf.set_text_color(*MESH_BLACK)
-        pdf.ln(3)
+    pdf.cell(0, 6, f'Generated: {document["generated"]}', 0, 1, 'C')
+    
+    # ===== CHAPTERS =====
+    rendered_sections = None
+    if futures:
+        try:
+            rendered_sections = [future.result() for future in futures]
+        except BrokenProcessPool:
+            drop_render_pool(pool)
+            # Charts from sections that did finish still need cleaning up
+            for future in futures:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    chart_paths.extend(path for path, _ in future.result()['images'])
+    
+    if sections is not None:
+        if rendered_sections is None:
+            rendered_sections = (render_section(company_name, section) for section in sections)
+        for rendered in rendered_sections:
+            chart_paths.extend(path for path, _ in rendered['images'])
+            pdf.append_section(rendered)
+    else:
+        for chapter in document['chapters']:
+            pdf.add_page()
+            pdf.chapter_title(chapter['title'])
+            for block in chapter['blocks']:
+                render_pdf_block(pdf, block, chart_paths)
     
-    pdf.ln(3)
+    # Save addendum PDF
+    addendum_path = f'/tmp/mesh_branded_addendum_{datetime.now().timestamp()}.pdf'
+    pdf.output(addendum_path)
     
-    # Add branded chart
-    if os.path.exists(chart_path):
-        pdf.image(chart_path, x=30, w=150)
-        pdf.ln(5)
+    # Clean up charts
+    for chart_path in chart_paths:
+        if os.path.exists(chart_path):
+            os.remove(chart_path)
     
-    pdf.section_title('Your Dimension Scores')
-    pdf.body_text(
-        'Your assessment evaluated five critical dimensions of AI readiness. Here\'s how you scored:'
-    )
-    pdf.ln(2)
-    
-    dimension_names = {
-        'strategyVision': 'Strategy & Vision',
-        'dataSystems': 'Data & Systems',
-        'peopleSkills': 'People & Skills',
-        'governanceEthics': 'Governance & Ethics',
-        'executionImpact': 'Execution & Impact'
-    }
+    return addendum_path
+
+def render_pdf_block(pdf, block, chart_paths):
+    """Draw a single document block onto the PDF"""
+    kind = block['type']
     
-    for key, name in dimension_names.items():
-        score = dimension_scores.get(key, 0)
-        detail = dimension_details.get(key, '')
-        
-        pdf.set_font('Arial', 'B', 11)
-        pdf.set_text_color(*MESH_DARK_RED)
-        pdf.cell(0, 6, f'{name}: {score}/100', 0, 1)
-        
-        if detail:
-            pdf.set_font('Arial', '', 10)
+    if kind == 'section':
+        if pdf.get_y() > 200:
+            pdf.add_page()
+        pdf.section_title(block['title'])
+        for child in block['blocks']:
+            render_pdf_block(pdf, child, chart_paths)
+    
+    elif kind == 'group':
+        pdf.subsection_title(block['title'])
+        for child in block['blocks']:
+            render_pdf_block(pdf, child, chart_paths)
+    
+    elif kind == 'paragraph':
+        if block['style'] == 'quote':
+            pdf.set_font('Arial', 'I', 10)
+            pdf.set_text_color(*MESH_DARK_RED)
+            pdf.multi_cell(0, 5, f'"{block["text"]}"')
             pdf.set_text_color(*MESH_BLACK)
-            pdf.multi_cell(0, 5, detail)
-        pdf.ln(2)
-    
-    # ===== YOUR STRATEGIC PROFILE =====
-    pdf.add_page()
-    pdf.chapter_title('Your Strategic Profile')
-    
-    pdf.body_text(
-        f'Based on the strategic questions you answered, here is {company_name}\'s AI implementation profile:'
-    )
-    pdf.ln(3)
-    
-    pdf.subsection_title('Company Overview')
-    pdf.bullet_point(f'Industry: {industry}')
-    pdf.bullet_point(f'Company Size: {company_size}')
-    pdf.bullet_point(f'Budget Range: {budget}')
-    pdf.bullet_point(f'Implementation Timeline: {timeline}')
-    pdf.bullet_point(f'Primary Driver: {primary_driver}')
-    pdf.ln(5)
-    
-    if implementation_guidance:
-        pdf.subsection_title('Implementation Guidance')
-        pdf.set_font('Arial', 'I', 10)
-        pdf.set_text_color(*MESH_DARK_RED)
-        pdf.multi_cell(0, 6, f'"{implementation_guidance}"')
-        pdf.set_text_color(*MESH_BLACK)
-        pdf.ln(5)
-    
-    # ===== YOUR RECOMMENDED AI TOOLKIT =====
-    pdf.add_page()
-    pdf.chapter_title('Your Recommended AI Toolkit')
-    
-    pdf.body_text(
-        f'Based on {company_name}\'s profile, readiness score, and business objectives, we recommend '
-        f'the following AI tools as your ideal starting point. These {len(recommended_tools)} tools have been '
-        f'selected to match your industry, budget, and implementation goals.'
-    )
-    pdf.ln(5)
+            pdf.ln(5)
+        else:
+            pdf.body_text(block['text'])
+            pdf.ln(3)
     
-    # Group tools by priority
-    essential = [t for t in recommended_tools if t.get('priority') == 'ESSENTIAL']
-    recommended_list = [t for t in recommended_tools if t.get('priority') == 'RECOMMENDED']
-    optional = [t for t in recommended_tools if t.get('priority') == 'OPTIONAL']
+    elif kind == 'fields':
+        for item in block['items']:
+            pdf.set_font('Arial', '', 11)
+            pdf.set_text_color(*MESH_BLACK)
+            pdf.cell(50, 6, f'{item["label"]}:', 0, 0)
+            pdf.set_font('Arial', 'B', 11)
+            pdf.set_text_color(*MESH_ORANGE)
+            pdf.cell(0, 6, str(item['value']), 0, 1)
+        pdf.ln(3)
     
-    for priority_label, tools in [('Essential Tools', essential), 
-                                   ('Recommended Tools', recommended_list), 
-                                   ('Optional Tools', optional)]:
-        if tools:
-            pdf.subsection_title(priority_label)
+    elif kind == 'chart':
+        # Sections rendered in the pool get charts already drawn by the parent
+        chart_path = block.get('path')
+        if chart_path is None:
+            chart_path = create_mesh_branded_chart(block['dimensionScores'])
+            chart_paths.append(chart_path)
+        if os.path.exists(chart_path):
+            pdf.image(chart_path, x=30, w=150)
+            pdf.ln(5)
+    
+    elif kind == 'scores':
+        for item in block['items']:
+            pdf.set_font('Arial', 'B', 11)
+            pdf.set_text_color(*MESH_DARK_RED)
+            pdf.cell(0, 6, f'{item["label"]}: {item["score"]}/100', 0, 1)
             
-            for tool in tools:
-                if pdf.get_y() > 240:
-                    pdf.add_page()
-                
-                # Tool name with orange accent
-                pdf.set_font('Arial', 'B', 13)
-                pdf.set_text_color(*MESH_ORANGE)
-                pdf.cell(0, 7, f'{tool.get("name", "Tool")}', 0, 1)
-                
+            if item['detail']:
                 pdf.set_font('Arial', '', 10)
-                pdf.set_text_color(*MESH_GRAY)
-                pdf.cell(0, 5, f'Category: {tool.get("category", "N/A")} | Match Score: {tool.get("matchScore", 0)}/100', 0, 1)
                 pdf.set_text_color(*MESH_BLACK)
-                pdf.ln(2)
-                
-                # Why we recommend
-                if tool.get('whyRecommend'):
-                    pdf.set_font('Arial', 'B', 10)
-                    pdf.set_text_color(*MESH_DARK_RED)
-                    pdf.cell(0, 5, 'Why We Recommend:', 0, 1)
-                    pdf.set_font('Arial', '', 10)
-                    pdf.set_text_color(*MESH_BLACK)
-                    for reason in tool.get('whyRecommend', []):
-                        pdf.bullet_point(reason, indent=3)
-                    pdf.ln(1)
-                
-                # Key features
-                if tool.get('keyFeatures'):
-                    pdf.set_font('Arial', 'B', 10)
-                    pdf.set_text_color(*MESH_DARK_RED)
-                    pdf.cell(0, 5, 'Key Features:', 0, 1)
-                    pdf.set_font('Arial', '', 10)
-                    pdf.set_text_color(*MESH_BLACK)
-                    for feature in tool.get('keyFeatures', [])[:5]:
-                        pdf.bullet_point(feature, indent=3)
-                    pdf.ln(1)
-                
-                # Pricing
-                if tool.get('pricing'):
-                    pdf.set_font('Arial', 'B', 10)
-                    pdf.set_text_color(*MESH_DARK_RED)
-                    pdf.cell(0, 5, 'Pricing:', 0, 1)
-                    pdf.set_font('Arial', '', 10)
-                    pdf.set_text_color(*MESH_BLACK)
-                    for price in tool.get('pricing', []):
-                        pdf.bullet_point(price, indent=3)
-                    pdf.ln(1)
-                
-                # Website
-                if tool.get('website'):
-                    pdf.set_font('Arial', 'I', 9)
-                    pdf.set_text_color(*MESH_ORANGE)
-                    pdf.cell(0, 5, f'Website: {tool.get("website")}', 0, 1)
-                    pdf.set_text_color(*MESH_BLACK)
-                
-                pdf.ln(5)
-    
-    # ===== YOUR PERSONALIZED ACTION PLAN =====
-    pdf.add_page()
-    pdf.chapter_title('Your Personalized Action Plan')
+                pdf.multi_cell(0, 5, item['detail'])
+            pdf.ln(2)
     
-    pdf.body_text(
-        f'This action plan combines insights from your AI Readiness Assessment with the recommended tools '
-        f'to create a clear roadmap for {company_name}\'s AI implementation journey.'
-    )
-    pdf.ln(5)
+    elif kind == 'comparison':
+        for item in block['items']:
+            render_pdf_comparison(pdf, item)
+        pdf.ln(3)
     
-    # Immediate next steps in accent box
-    if next_steps:
-        pdf.section_title('Immediate Next Steps')
-        pdf.body_text('Start your AI journey with these concrete actions:')
-        pdf.ln(2)
-        
-        for i, step in enumerate(next_steps, 1):
+    elif kind == 'histogram':
+        render_pdf_histogram(pdf, block)
+    
+    elif kind == 'bullets':
+        for item in block['items']:
+            pdf.bullet_point(item)
+        pdf.ln(5)
+    
+    elif kind == 'steps':
+        for i, step in enumerate(block['items'], 1):
             pdf.set_font('Arial', 'B', 11)
             pdf.set_text_color(*MESH_ORANGE)
             pdf.cell(8, 6, f'{i}.', 0, 0)
@@ -424,85 +616,128 @@ def generate_mesh_branded_addendum(session_data):
             pdf.ln(1)
         pdf.ln(3)
     
-    # High priority recommendations
-    high_priority = recommendations.get('high', [])
-    if high_priority:
-        pdf.section_title('High Priority Recommendations')
-        pdf.body_text(
-            'Based on your assessment scores, these are the most critical areas to address:'
-        )
-        pdf.ln(2)
-        
-        for rec in high_priority[:4]:
-            if pdf.get_y() > 230:
-                pdf.add_page()
-            
-            pdf.set_font('Arial', 'B', 12)
-            pdf.set_text_color(*MESH_DARK_RED)
-            title = rec.get('title', 'Recommendation')
-            if rec.get('dimension'):
-                title += f' ({rec.get("dimension")})'
-            pdf.cell(0, 6, title, 0, 1)
-            pdf.set_text_color(*MESH_BLACK)
-            
-            if rec.get('description'):
-                pdf.set_font('Arial', '', 10)
-                pdf.multi_cell(0, 5, rec.get('description'))
-                pdf.ln(1)
-            
-            if rec.get('actionItems'):
-                pdf.set_font('Arial', 'B', 9)
-                pdf.set_text_color(*MESH_DARK_RED)
-                pdf.cell(0, 5, 'Action Items:', 0, 1)
-                pdf.set_font('Arial', '', 9)
-                pdf.set_text_color(*MESH_BLACK)
-                for action in rec.get('actionItems', []):
-                    pdf.bullet_point(action, indent=3)
-            
-            pdf.ln(3)
+    elif kind == 'tool':
+        render_pdf_tool(pdf, block)
     
-    # Medium priority recommendations
-    medium_priority = recommendations.get('medium', [])
-    if medium_priority:
-        if pdf.get_y() > 200:
+    elif kind == 'recommendation':
+        render_pdf_recommendation(pdf, block)
+
+def render_pdf_comparison(pdf, item):
+    """Score bar with the peer median marked, plus the percentile"""
+    if pdf.get_y() > 250:
+        pdf.add_page()
+    
+    pdf.set_font('Arial', 'B', 11)
+    pdf.set_text_color(*MESH_DARK_RED)
+    pdf.cell(70, 6, f'{item["label"]}: {item["score"]}/100', 0, 0)
+    pdf.set_font('Arial', '', 10)
+    pdf.set_text_color(*MESH_GRAY)
+    pdf.cell(0, 6, f'{ordinal(item["percentile"])} percentile  |  Peer median: {item["median"]}/100', 0, 1, 'R')
+    
+    bar_x, bar_y, bar_w = pdf.l_margin, pdf.get_y() + 1, pdf.epw
+    pdf.set_fill_color(*MESH_LIGHT_GRAY)
+    pdf.rect(bar_x, bar_y, bar_w, 4, 'F')
+    pdf.set_fill_color(*MESH_ORANGE)
+    pdf.rect(bar_x, bar_y, bar_w * item['score'] / 100, 4, 'F')
+    pdf.set_fill_color(*MESH_BURGUNDY)
+    pdf.rect(bar_x + bar_w * item['median'] / 100 - 0.5, bar_y - 1, 1, 6, 'F')
+    pdf.set_text_color(*MESH_BLACK)
+    pdf.set_y(bar_y + 8)
+
+def render_pdf_histogram(pdf, block):
+    """Column chart of the overall score distribution with the company's bin highlighted"""
+    chart_h = 45
+    if pdf.get_y() + chart_h + 15 > pdf.page_break_trigger:
+        pdf.add_page()
+    
+    rows = list(histogram_rows(block))
+    peak = max(count for _, count, _ in rows) or 1
+    col_w = pdf.epw / len(rows)
+    base_y = pdf.get_y() + chart_h
+    pdf.set_font('Arial', '', 8)
+    for i, (label, count, highlight) in enumerate(rows):
+        x = pdf.l_margin + i * col_w
+        bar_h = chart_h * count / peak
+        pdf.set_fill_color(*(MESH_ORANGE if highlight else MESH_LIGHT_GRAY))
+        if bar_h > 0:
+            pdf.rect(x + 2, base_y - bar_h, col_w - 4, bar_h, 'F')
+        pdf.set_text_color(*(MESH_ORANGE if highlight else MESH_GRAY))
+        pdf.set_xy(x, base_y + 1)
+        pdf.cell(col_w, 4, label, 0, 0, 'C')
+        pdf.set_xy(x, base_y + 5)
+        pdf.cell(col_w, 4, 'You' if highlight else f'{count:,}', 0, 0, 'C')
+    pdf.set_text_color(*MESH_BLACK)
+    pdf.set_xy(pdf.l_margin, base_y + 12)
+
+def render_pdf_tool(pdf, tool):
+    if pdf.get_y() > 240:
+        pdf.add_page()
+    
+    card = get_tool_card(tool)
+    pdf.place_fragment(card['head'])
+    
+    pdf.set_font('Arial', '', 10)
+    pdf.set_text_color(*MESH_GRAY)
+    pdf.cell(0, 5, f'Category: {tool.get("category", "N/A")} | Match Score: {tool.get("matchScore", 0)}/100', 0, 1)
+    pdf.set_text_color(*MESH_BLACK)
+    pdf.ln(2)
+    
+    # Why we recommend
+    if tool.get('whyRecommend'):
+        pdf.set_font('Arial', 'B', 10)
+        pdf.set_text_color(*MESH_DARK_RED)
+        pdf.cell(0, 5, 'Why We Recommend:', 0, 1)
+        pdf.set_font('Arial', '', 10)
+        pdf.set_text_color(*MESH_BLACK)
+        for reason in tool.get('whyRecommend', []):
+            pdf.bullet_point(reason, indent=3)
+        pdf.ln(1)
+    
+    # Key features, pricing and website are shared across customers
+    if card['tail']['height'] > pdf.eph:
+        draw_tool_card_tail(pdf, tool)
+    else:
+        if pdf.get_y() + card['tail']['height'] > pdf.page_break_trigger:
             pdf.add_page()
-        
-        pdf.section_title('Medium Priority Recommendations')
-        pdf.body_text('Once high-priority items are underway, focus on these areas:')
-        pdf.ln(2)
-        
-        for rec in medium_priority[:3]:
-            if pdf.get_y() > 230:
-                pdf.add_page()
-            
-            pdf.set_font('Arial', 'B', 11)
-            pdf.set_text_color(*MESH_DARK_RED)
-            title = rec.get('title', 'Recommendation')
-            if rec.get('dimension'):
-                title += f' ({rec.get("dimension")})'
-            pdf.cell(0, 6, title, 0, 1)
-            pdf.set_text_color(*MESH_BLACK)
-            
-            if rec.get('description'):
-                pdf.set_font('Arial', '', 10)
-                pdf.multi_cell(0, 5, rec.get('description'))
-            
-            pdf.ln(3)
+        pdf.place_fragment(card['tail'])
     
-    # Save addendum PDF
-    addendum_path = f'/tmp/mesh_branded_addendum_{datetime.now().timestamp()}.pdf'
-    pdf.output(addendum_path)
+    pdf.ln(5)
+
+def render_pdf_recommendation(pdf, rec):
+    if pdf.get_y() > 230:
+        pdf.add_page()
     
-    # Clean up chart
-    if os.path.exists(chart_path):
-        os.remove(chart_path)
+    high = rec['priority'] == 'high'
+    pdf.set_font('Arial', 'B', 12 if high else 11)
+    pdf.set_text_color(*MESH_DARK_RED)
+    pdf.cell(0, 6, rec['title'], 0, 1)
+    pdf.set_text_color(*MESH_BLACK)
     
-    return addendum_path
+    if rec['description']:
+        pdf.set_font('Arial', '', 10)
+        pdf.multi_cell(0, 5, rec['description'])
+        if high:
+            pdf.ln(1)
+    
+    if rec['actionItems']:
+        pdf.set_font('Arial', 'B', 9)
+        pdf.set_text_color(*MESH_DARK_RED)
+        pdf.cell(0, 5, 'Action Items:', 0, 1)
+        pdf.set_font('Arial', '', 9)
+        pdf.set_text_color(*MESH_BLACK)
+        for action in rec['actionItems']:
+            pdf.bullet_point(action, indent=3)
+    
+    pdf.ln(3)
 
-def merge_playbook_with_addendum(base_pdf_path, addendum_pdf_path, output_path):
+def merge_playbook_with_addendum(base_pdf_path, addendum_pdf_path, output_path, created=None):
     """Merge the base playbook with custom addendum"""
     merger = PdfMerger()
     
+    # Pin the metadata for reproducible output; PdfMerger writes no /ID of its own
+    if created is not None:
+        merger.add_metadata({'/Producer': 'MESH AI Playbook Generator', '/CreationDate': pdf_date(created)})
+    
     # Add custom addendum first (personalized pages)
     merger.append(addendum_pdf_path)
     
@@ -515,17 +750,18 @@ def merge_playbook_with_addendum(base_pdf_path, addendum_pdf_path, output_path):
     
     return output_path
 
-def generate_complete_playbook_branded(session_data, base_pdf_path):
+def generate_complete_playbook_branded(session_data, base_pdf_path, clock=None):
     """Generate complete MESH-branded playbook"""
+    created = clock() if clock else None
     
     # Generate MESH-branded addendum
-    addendum_path = generate_mesh_branded_addendum(session_data)
+    addendum_path = generate_mesh_branded_addendum(session_data, clock=(lambda: created) if clock else None)
     
     # Merge with base PDF
     output_path = f'/home/ubuntu/playbook-generator/backend/output/mesh_playbook_{datetime.now().timestamp()}.pdf'
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    final_path = merge_playbook_with_addendum(base_pdf_path, addendum_path, output_path)
+    final_path = merge_playbook_with_addendum(base_pdf_path, addendum_path, output_path, created)
     
     # Clean up temporary addendum
     if os.path.exists(addendum_path):
@@ -0,0 +1,164 @@
+import os
+import math
+import time
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+class AdmissionRejected(Exception):
+    """Raised when a generation cannot start within the memory budget"""
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def read_rss_mb(pid='self'):
+    """Resident memory of a process in MB"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def read_tree_rss_mb():
+    """Resident memory of this process and all its descendants in MB (Linux only).
+
+    Kaleido's Chromium and the render pool are child processes, so they
+    only show up here, not in this process's own RSS.
+    """
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces, so parse after the closing parenthesis
+        children.setdefault(int(stat.rsplit(')', 1)[1].split()[1]), []).append(int(entry))
+    total = 0.0
+    pending = [os.getpid()]
+    while pending:
+        pid = pending.pop()
+        total += read_rss_mb(pid)
+        pending.extend(children.get(pid, ()))
+    return total
+
+class MemoryBudget:
+    """Admission control for memory-hungry generations in a single worker process.
+
+    Each generation reserves its expected peak memory before it starts. A
+    generation is admitted while both the reservations and the resident
+    memory of this worker and its child processes (Kaleido, the render
+    pool) leave room for the estimate within `budget_mb`. The estimate
+    never drops below `initial_estimate_mb`; with `trace`, it rises to the
+    largest tracemalloc peak among the last `history` generations that ran
+    alone. Work that does not fit waits up to `queue_timeout` seconds (at
+    most `max_queue` waiters) and is then rejected with AdmissionRejected.
+    One generation is always admitted when nothing else is running, so a
+    low budget cannot block everything.
+    """
+
+    def __init__(self, budget_mb, initial_estimate_mb=150, queue_timeout=10, max_queue=8,
+                 trace=False, history=20):
+        self.budget_mb = budget_mb
+        self.initial_estimate_mb = initial_estimate_mb
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.trace = trace
+        self.peaks = deque(maxlen=history)
+        self.durations = deque(maxlen=history)
+        self.reserved_mb = 0.0
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.condition = threading.Condition()
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def estimate_mb(self):
+        return max(self.initial_estimate_mb, max(self.peaks, default=0.0))
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up, for the Retry-After header"""
+        average = sum(self.durations) / len(self.durations) if self.durations else 5
+        return max(1, math.ceil(average * (self.waiting + 1) / max(self.active, 1)))
+
+    def fits(self, estimate):
+        if self.active == 0:
+            return True
+        return (self.reserved_mb + estimate <= self.budget_mb and
+                read_tree_rss_mb() + estimate <= self.budget_mb)
+
+    @contextmanager
+    def admit(self):
+        """Reserve memory for one generation, waiting or rejecting if over budget"""
+        with self.condition:
+            estimate = self.estimate_mb()
+            if not self.fits(estimate):
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise AdmissionRejected('Generation queue is full', self.retry_after())
+                self.waiting += 1
+                try:
+                    deadline = time.monotonic() + self.queue_timeout
+                    while not self.fits(estimate):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected += 1
+                            raise AdmissionRejected('Memory budget exhausted', self.retry_after())
+                        self.condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            # The traced peak is this generation's own working set only when it runs alone
+            alone = self.active == 0
+            self.active += 1
+            self.admitted += 1
+            self.reserved_mb += estimate
+            admitted = self.admitted
+
+        measure = alone and self.trace
+        if measure:
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - start
+            peak = 0.0
+            if measure:
+                peak = (tracemalloc.get_traced_memory()[1] - traced_before) / (1024 * 1024)
+
+            with self.condition:
+                if self.admitted != admitted:
+                    # Another generation overlapped, so the peak is not this one's alone
+                    peak = 0.0
+                self.active -= 1
+                self.reserved_mb -= estimate
+                if peak > 0:
+                    self.peaks.append(peak)
+                self.durations.append(duration)
+                self.condition.notify_all()
+
+    def state(self):
+        """Snapshot of the budget for health checks"""
+        with self.condition:
+            return {
+                'budgetMb': self.budget_mb,
+                'reservedMb': round(self.reserved_mb, 1),
+                'estimateMb': round(self.estimate_mb(), 1),
+                'lastPeakMb': round(self.peaks[-1], 1) if self.peaks else None,
+                'rssMb': round(read_tree_rss_mb(), 1),
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'tracemalloc': self.trace
+            }
@@ -1,10 +1,17 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, url_for
 from flask_cors import CORS
+import io
 import os
 import json
+import hashlib
 from datetime import datetime
-from text_parser import parse_text_file
-from addendum_generator import generate_complete_playbook_branded
+from text_parser import parse_text_file, ParseBudgetExceeded
+from addendum_generator import generate_complete_playbook_branded, generate_mesh_branded_addendum, merge_playbook_with_addendum, day_clock
+from admission import MemoryBudget, AdmissionRejected
+from singleflight import SingleFlight, request_key
+from cohort_store import CohortStore
+from delivery import AddendumStore, file_digest, IMMUTABLE_MAX_AGE
+from playbook_document import build_playbook_document, serialize_document, render_html, render_markdown
 
 app = Flask(__name__)
 CORS(app)
@@ -15,16 +22,94 @@ BASE_PDF_PATH = os.path.join(BASE_DIR, 'AI-Implementation-Playbook.pdf')
 OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Memory budget for PDF generations in this worker process
+generation_budget = MemoryBudget(
+    budget_mb=int(os.environ.get('MESH_MEMORY_BUDGET_MB', '1024')),
+    initial_estimate_mb=int(os.environ.get('MESH_GENERATION_ESTIMATE_MB', '150')),
+    queue_timeout=float(os.environ.get('MESH_ADMISSION_QUEUE_SECONDS', '10')),
+    max_queue=int(os.environ.get('MESH_ADMISSION_MAX_QUEUE', '8')),
+    trace=os.environ.get('MESH_TRACEMALLOC') == '1'
+)
+
+# Coalesces identical concurrent generations within and across workers on this host
+coalescer = SingleFlight(os.environ.get('MESH_SINGLEFLIGHT_DIR', os.path.join(OUTPUT_DIR, '.inflight')))
+
+# Scores of every generated playbook, for the "How You Compare" section
+cohort_store = CohortStore(os.environ.get('MESH_COHORT_DIR', os.path.join(OUTPUT_DIR, 'cohort')))
+
+# Addenda for split delivery, served next to the shared base playbook
+addendum_store = AddendumStore(
+    os.environ.get('MESH_ADDENDUM_DIR', os.path.join(OUTPUT_DIR, 'addenda')),
+    ttl=int(os.environ.get('MESH_ADDENDUM_TTL_SECONDS', str(24 * 3600)))
+)
+
+# Reproducible renders: dates come from the day and benchmarks from the cohort
+# pinned for that day, so identical inputs on the same day give identical bytes
+render_clock = day_clock if os.environ.get('MESH_DETERMINISTIC_RENDER') == '1' else None
+
+def benchmark_store():
+    """Cohort store to compare against: the live one, or today's pinned copy"""
+    if render_clock is None:
+        return cohort_store
+    return cohort_store.pinned(render_clock().strftime('%Y%m%d'))
+
 # In-memory session storage (for MVP)
 sessions = {}
 
+# Output formats that are rendered straight from the document model, without a PDF
+DOCUMENT_FORMATS = {
+    'html': (render_html, 'text/html'),
+    'markdown': (render_markdown, 'text/markdown'),
+    'json': (serialize_document, 'application/json')
+}
+
+# PDF deliveries: one merged file, or the addendum plus a manifest pointing at the cached base playbook
+PDF_DELIVERIES = ('combined', 'split')
+
+def immutable(response, digest):
+    """Mark a content-addressed response as cacheable forever"""
+    response.set_etag(digest)
+    response.cache_control.no_cache = False
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+def split_manifest(addendum_digest, addendum_size):
+    """Describe where a split delivery's parts live and how they combine"""
+    base_digest = file_digest(BASE_PDF_PATH)
+    return {
+        'delivery': 'split',
+        'addendum': {
+            'url': url_for('get_addendum', digest=addendum_digest),
+            'sha256': addendum_digest,
+            'bytes': addendum_size
+        },
+        'basePlaybook': {
+            'url': url_for('get_base_playbook', digest=base_digest),
+            'sha256': base_digest,
+            'bytes': os.path.getsize(BASE_PDF_PATH)
+        },
+        # The addendum comes first, then the base playbook
+        'order': ['addendum', 'basePlaybook'],
+        'combined': {'url': url_for('get_combined_playbook', digest=addendum_digest)}
+    }
+
+def cohort_identity(company_name, readiness_bytes, toolbox_data):
+    """Stable key for a company's cohort row: its name and segment, or its report if unnamed"""
+    name = company_name.strip().lower()
+    if not name or name == 'your company':
+        name = hashlib.sha256(readiness_bytes).hexdigest()
+    return '\n'.join([name, toolbox_data.industry.strip(), toolbox_data.company_size.strip()])
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'MESH AI Playbook Generator',
         'version': '2.0-branded',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now().isoformat(),
+        'memoryBudget': generation_budget.state()
     })
 
 @app.route('/api/generate-playbook', methods=['POST'])
@@ -44,38 +129,134 @@ def generate_playbook():
         risk_tolerance = request.form.get('riskTolerance', 'Moderate')
         timeline = request.form.get('timeline', 'Standard (3-6 months)')
         leadership = request.form.get('leadership', 'Cross-functional team')
+        output_format = request.form.get('format', 'pdf').lower()
+        delivery = request.form.get('delivery', 'combined').lower()
         
-        # Read and parse files
-        readiness_content = readiness_file.read().decode('utf-8')
-        toolbox_content = toolbox_file.read().decode('utf-8')
+        if output_format != 'pdf' and output_format not in DOCUMENT_FORMATS:
+            return jsonify({'error': f'Unsupported format: {output_format}'}), 400
+        if delivery not in PDF_DELIVERIES:
+            return jsonify({'error': f'Unsupported delivery: {delivery}'}), 400
         
-        readiness_data = parse_text_file(readiness_content, 'readiness')
-        toolbox_data = parse_text_file(toolbox_content, 'toolbox')
+        readiness_bytes = readiness_file.read()
+        toolbox_bytes = toolbox_file.read()
         
-        # Create session data
-        session_data = {
-            'companyName': company_name,
-            'readiness': readiness_data,
-            'toolbox': toolbox_data,
-            'strategic': {
-                'primaryDriver': primary_driver,
-                'riskTolerance': risk_tolerance,
-                'timeline': timeline,
-                'leadership': leadership
+        def generate():
+            # Read and parse files
+            readiness_data = parse_text_file(readiness_bytes.decode('utf-8'), 'readiness')
+            toolbox_data = parse_text_file(toolbox_bytes.decode('utf-8'), 'toolbox')
+            
+            # Regenerating for the same company replaces its cohort row instead of adding one
+            identity = cohort_identity(company_name, readiness_bytes, toolbox_data)
+            benchmark = benchmark_store().compare(readiness_data, toolbox_data, identity)
+            
+            # Create session data
+            session_data = {
+                'companyName': company_name,
+                'readiness': readiness_data,
+                'toolbox': toolbox_data,
+                'benchmark': benchmark,
+                'strategic': {
+                    'primaryDriver': primary_driver,
+                    'riskTolerance': risk_tolerance,
+                    'timeline': timeline,
+                    'leadership': leadership
+                }
             }
-        }
+            
+            # Web and email deliveries skip PDF rendering entirely
+            if output_format in DOCUMENT_FORMATS:
+                render = DOCUMENT_FORMATS[output_format][0]
+                document = build_playbook_document(session_data, clock=render_clock or datetime.now)
+                return render(document).encode('utf-8')
+            
+            # Generate playbook, or only the addendum for split delivery
+            with generation_budget.admit():
+                if delivery == 'split':
+                    pdf_path = generate_mesh_branded_addendum(session_data, clock=render_clock)
+                else:
+                    pdf_path = generate_complete_playbook_branded(session_data, BASE_PDF_PATH, clock=render_clock)
+            with open(pdf_path, 'rb') as f:
+                pdf_bytes = f.read()
+            if delivery == 'split':
+                os.remove(pdf_path)
+            
+            # Only generated playbooks count towards the cohort, not previews or rejected attempts
+            cohort_store.append(readiness_data, toolbox_data, identity)
+            return pdf_bytes
         
-        # Generate playbook
-        pdf_path = generate_complete_playbook_branded(session_data, BASE_PDF_PATH)
+        # Identical concurrent requests (double clicks, retries) share one generation
+        key = request_key([readiness_bytes, toolbox_bytes], request.form.to_dict())
+        result = coalescer.do(key, generate)
         
-        # Return the PDF
-        return send_file(
-            pdf_path,
+        if output_format in DOCUMENT_FORMATS:
+            mimetype = DOCUMENT_FORMATS[output_format][1]
+            return Response(result, mimetype=mimetype)
+        
+        if delivery == 'split':
+            digest = addendum_store.put(result)
+            return jsonify(split_manifest(digest, len(result)))
+        
+        # Return the PDF, with a hash clients can verify (stable across renders in deterministic mode)
+        response = send_file(
+            io.BytesIO(result),
             mimetype='application/pdf',
             as_attachment=True,
             download_name=f'{company_name.replace(" ", "_")}_AI_Playbook.pdf'
         )
+        digest = hashlib.sha256(result).hexdigest()
+        response.set_etag(digest)
+        response.headers['X-Content-SHA256'] = digest
+        return response
+        
+    except AdmissionRejected as e:
+        response = jsonify({'error': str(e), 'memoryBudget': generation_budget.state()})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+    except ParseBudgetExceeded as e:
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/addenda/<digest>.pdf', methods=['GET'])
+def get_addendum(digest):
+    """Serve a split-delivery addendum by content hash"""
+    path = addendum_store.file_path(digest)
+    if path is None:
+        return jsonify({'error': 'Addendum not found or expired'}), 404
+    return immutable(send_file(path, mimetype='application/pdf', etag=False), digest)
+
+@app.route('/api/base-playbook/<digest>.pdf', methods=['GET'])
+def get_base_playbook(digest):
+    """Serve the shared base playbook; only its current content hash is valid"""
+    if digest != file_digest(BASE_PDF_PATH):
+        return jsonify({'error': 'Unknown base playbook version'}), 404
+    return immutable(send_file(BASE_PDF_PATH, mimetype='application/pdf', etag=False), digest)
+
+@app.route('/api/playbooks/<digest>.pdf', methods=['GET'])
+def get_combined_playbook(digest):
+    """Merge a split-delivery addendum with the base playbook on demand"""
+    try:
+        path = addendum_store.file_path(digest)
+        if path is None:
+            return jsonify({'error': 'Addendum not found or expired'}), 404
+        
+        with generation_budget.admit():
+            merged = merge_playbook_with_addendum(BASE_PDF_PATH, path, io.BytesIO())
+        
+        response = send_file(
+            io.BytesIO(merged.getvalue()),
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name='AI_Playbook.pdf',
+            etag=False
+        )
+        # The merged file is fully determined by the addendum and the base playbook
+        return immutable(response, f'{digest}-{file_digest(BASE_PDF_PATH)}')
         
+    except AdmissionRejected as e:
+        response = jsonify({'error': str(e), 'memoryBudget': generation_budget.state()})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -102,7 +283,8 @@ def test_generate():
             }
         }
         
-        pdf_path = generate_complete_playbook_branded(session_data, BASE_PDF_PATH)
+        with generation_budget.admit():
+            pdf_path = generate_complete_playbook_branded(session_data, BASE_PDF_PATH, clock=render_clock)
         
         return send_file(
             pdf_path,
@@ -111,6 +293,10 @@ def test_generate():
             download_name='Test_Company_AI_Playbook.pdf'
         )
         
+    except AdmissionRejected as e:
+        response = jsonify({'error': str(e), 'memoryBudget': generation_budget.state()})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
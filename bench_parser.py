@@ -0,0 +1,79 @@
+"""Adversarial-input benchmark for text_parser.
+
+Parses crafted inputs that trigger superlinear behaviour in naive regexes
+(long whitespace and digit runs, unbalanced brackets, repeated headings,
+unterminated sections) at increasing sizes up to MAX_PARSE_CHARS. It prints
+the worst-case latency and exits non-zero if any parse exceeds
+PARSE_TIME_BUDGET or grows clearly faster than linearly with input size.
+
+    python bench_parser.py
+    python bench_parser.py --sizes 10000,100000,1000000 --repeat 3
+"""
+import sys
+import time
+import argparse
+from text_parser import parse_text_file, MAX_PARSE_CHARS, PARSE_TIME_BUDGET
+
+def fill(prefix, unit, size, suffix=''):
+    """prefix + unit repeated until the whole input is about size characters"""
+    count = max(1, (size - len(prefix) - len(suffix)) // len(unit))
+    return prefix + unit * count + suffix
+
+ADVERSARIAL_INPUTS = {
+    'newline run in recommendations': lambda n: fill('HIGH PRIORITY\n---\nintro', '\n', n, 'x'),
+    'spaces and newlines in recommendations': lambda n: fill('HIGH PRIORITY\n---\nintro', ' \n', n, 'x'),
+    'unbalanced parentheses in title': lambda n: fill('HIGH PRIORITY\n---\nintro\n1. t', '(', n),
+    'unbalanced brackets in tool name': lambda n: fill('RECOMMENDED TOOLS\n\n1. t', '[', n, '\n==='),
+    'digit run in next steps': lambda n: fill('RECOMMENDED TOOLS\nNEXT STEPS\n', '1', n),
+    'unterminated tools section': lambda n: fill('RECOMMENDED TOOLS', '\nx', n),
+    'repeated tools heading': lambda n: fill('', 'RECOMMENDED TOOLS ', n),
+    'repeated guidance heading': lambda n: fill('RECOMMENDED TOOLS\n', 'IMPLEMENTATION GUIDANCE x\n', n),
+    'repeated dimension name on one line': lambda n: fill('AI READINESS ASSESSMENT\n', 'Strategy & Vision ', n),
+    'dimension name over whitespace': lambda n: fill('AI READINESS ASSESSMENT\nStrategy', ' ', n, '&'),
+    'many numbered recommendations': lambda n: fill('HIGH PRIORITY\n---\nintro', '\n1. T (D)\nd\nAction Items:\n1. a', n),
+}
+
+def time_parse(content, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse_text_file(content, 'auto')
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Worst-case latency benchmark for text_parser')
+    parser.add_argument('--sizes', default=f'10000,100000,{MAX_PARSE_CHARS}',
+                        help='comma separated input sizes in characters')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the fastest is reported')
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    header = f'{"case":<40}' + ''.join(f'{size:>12,}' for size in sizes) + f'{"growth":>9}'
+    print(header)
+    print('-' * len(header))
+
+    failures = []
+    worst = 0.0
+    for name, build in ADVERSARIAL_INPUTS.items():
+        timings = [time_parse(build(size), args.repeat) for size in sizes]
+        worst = max(worst, max(timings))
+
+        # Time per character should stay flat for linear behaviour; allow a
+        # generous factor for noise on very small inputs
+        per_char = [t / size for t, size in zip(timings, sizes)]
+        growth = per_char[-1] / per_char[0] if per_char[0] > 0 else 1.0
+        print(f'{name:<40}' + ''.join(f'{t * 1000:>10.2f}ms' for t in timings) + f'{growth:>8.1f}x')
+
+        if max(timings) > PARSE_TIME_BUDGET:
+            failures.append(f'{name}: {max(timings):.2f}s exceeds the {PARSE_TIME_BUDGET:g}s budget')
+        if len(sizes) > 1 and growth > 10:
+            failures.append(f'{name}: time per character grew {growth:.1f}x across sizes')
+
+    print(f'\nWorst case: {worst * 1000:.1f}ms (budget {PARSE_TIME_BUDGET * 1000:.0f}ms)')
+    for failure in failures:
+        print(f'FAIL {failure}')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
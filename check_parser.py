@@ -0,0 +1,85 @@
+"""Equivalence check for text_parser against an earlier revision.
+
+Parses synthetic reports and random fragments with both the current parser
+and the one at a git revision (by default the parser before the
+linear-time rewrite), and compares their dict output. The fragments mix
+section headings, numbering, dimension names split across lines and
+repeated dimension names with their scores. Exits non-zero on any
+mismatch.
+
+    python check_parser.py
+    python check_parser.py --cases 60000 --seed 2
+"""
+import os
+import sys
+import types
+import random
+import argparse
+import subprocess
+import text_parser
+from loadtest import synthetic_readiness, synthetic_toolbox
+
+BASELINE_REVISION = '5fdfcc1^'
+
+# Fragments of both report formats, joined at random
+REPORT_FRAGMENTS = [
+    'HIGH PRIORITY', 'MEDIUM PRIORITY', '---', '===', '\n', ' ', '\n\n', '1. ', '2.', '(', ')', '[', ']',
+    'Title', 'Action Items:', 'RECOMMENDED TOOLS', 'NEXT STEPS', 'BUDGET PLANNING', 'IMPLEMENTATION GUIDANCE',
+    'Strategy & Vision', 'Score: 5', 'Data & Systems', 'x', '12', '.', '\t', 'Match Score: 3', '• a',
+    'Key Features:', 'Pricing:', 'a: b'
+]
+
+# Dimension names whole, split across lines and repeated, next to scores and details
+DIMENSION_FRAGMENTS = [
+    'Data', 'data', '&', 'Systems', 'Strategy', 'Vision', 'Score:', 'score:', 'Score: 46', '46', '7',
+    '\n', '\n', ' ', '\t', 'detail', 'x', 'Data & Systems', 'Strategy &\nVision', 'Strategy\n&\nVision',
+    'Data &\nSystems\nScore: 46\n', 'Data & Systems Data & Systems', '\n\n', 'Governance & Ethics',
+    '🛡️ ', 'People & Skills', 'People &\n Skills\nScore: 3\nx', 'Execution & Impact'
+]
+
+def load_baseline(revision):
+    """text_parser as of a git revision, as a module"""
+    source = subprocess.run(['git', 'show', f'{revision}:text_parser.py'], capture_output=True, text=True,
+                            check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    module = types.ModuleType('text_parser_baseline')
+    exec(compile(source, f'{revision}:text_parser.py', 'exec'), module.__dict__)
+    return module
+
+def fuzz_inputs(rng, cases):
+    for _ in range(100):
+        yield synthetic_readiness(rng, rng.randint(0, 6))
+        yield synthetic_toolbox(rng, rng.randint(0, 10))
+    for fragments in (REPORT_FRAGMENTS, DIMENSION_FRAGMENTS):
+        for _ in range(cases // 2):
+            yield ''.join(rng.choice(fragments) for _ in range(rng.randint(1, 60)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare text_parser output with an earlier revision')
+    parser.add_argument('--baseline', default=BASELINE_REVISION, help='git revision to compare against')
+    parser.add_argument('--cases', type=int, default=20000, help='random fragment inputs to compare')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the random inputs')
+    args = parser.parse_args(argv)
+    baseline = load_baseline(args.baseline)
+
+    compared = 0
+    mismatches = []
+    for content in fuzz_inputs(random.Random(args.seed), args.cases):
+        for file_type in ('readiness', 'toolbox'):
+            compared += 1
+            expected = baseline.parse_text_file(content, file_type)
+            if hasattr(expected, 'to_dict'):
+                # Revisions since the records change return ReadinessReport and ToolboxReport
+                expected = expected.to_dict()
+            actual = text_parser.parse_text_file(content, file_type).to_dict()
+            if actual != expected:
+                mismatches.append((file_type, content, expected, actual))
+
+    print(f'{compared:,} parses compared with {args.baseline}, {len(mismatches):,} mismatches')
+    for file_type, content, expected, actual in mismatches[:5]:
+        print(f'FAIL {file_type} {content!r}')
+        print(f'  expected {expected}')
+        print(f'  actual   {actual}')
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
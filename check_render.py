@@ -0,0 +1,64 @@
+"""Reproducibility check for fixed-date addendum renders.
+
+Renders synthetic playbooks with a fixed creation date in this process and
+in the render pool, then compares SHA-256 hashes. Golden files and
+content-addressed addenda rely on these being equal whatever the host's
+CPU count or whether the pool broke mid-render. Exits non-zero on any
+mismatch.
+
+    python check_render.py
+    python check_render.py --tools 8,40 --seed 2
+"""
+import os
+import sys
+import random
+import hashlib
+import argparse
+import warnings
+from datetime import datetime, timezone
+from text_parser import parse_text_file
+from playbook_document import build_playbook_document
+from addendum_generator import render_playbook_pdf
+from loadtest import synthetic_readiness, synthetic_toolbox
+
+CREATED = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def render_sha256(document, parallel):
+    path = render_playbook_pdf(document, parallel=parallel, created=CREATED)
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    finally:
+        os.remove(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check that fixed-date renders are byte-identical')
+    parser.add_argument('--tools', default='8,40', help='comma separated tools per synthetic toolbox')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the synthetic inputs')
+    args = parser.parse_args(argv)
+    # fpdf warns on every Arial call that it substitutes the core Helvetica
+    # font; the environment carries the filter into the render pool too
+    warnings.filterwarnings('ignore', message='Substituting font')
+    os.environ['PYTHONWARNINGS'] = 'ignore:Substituting font'
+
+    failures = []
+    for tools in [int(count) for count in args.tools.split(',')]:
+        rng = random.Random(args.seed)
+        session_data = {
+            'companyName': 'Check Company',
+            'readiness': parse_text_file(synthetic_readiness(rng), 'readiness'),
+            'toolbox': parse_text_file(synthetic_toolbox(rng, tools), 'toolbox'),
+            'strategic': {}
+        }
+        document = build_playbook_document(session_data, clock=lambda: CREATED)
+        hashes = {parallel: render_sha256(document, parallel) for parallel in (False, True)}
+        print(f'{tools:>4} tools  serial {hashes[False][:16]}  parallel {hashes[True][:16]}')
+        if hashes[False] != hashes[True]:
+            failures.append(f'{tools} tools: serial and parallel renders differ')
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
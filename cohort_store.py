@@ -0,0 +1,303 @@
+"""Columnar store of assessment scores for peer benchmarking.
+
+Every generated playbook stores one row per company: the overall score,
+the five dimension scores, and the dictionary-encoded industry and
+company size. Rows are keyed by a hash of the company's identity, so a
+company that generates again replaces its row instead of adding one.
+pinned() gives a read-only copy of the store as of a label such as a day,
+for renders that must not change as rows are added.
+Each column is a fixed-width file that is memory-mapped for queries, so
+percentiles and histograms for a segment are a few vectorized NumPy passes
+no matter how many rows are stored.
+
+    python cohort_store.py --bench 2000000
+"""
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import argparse
+import threading
+import numpy as np
+from records import ReadinessReport, DimensionScores, ToolboxReport
+
+SCORE_COLUMNS = [
+    ('overallScore', 'Overall Score'),
+    ('strategyVision', 'Strategy & Vision'),
+    ('dataSystems', 'Data & Systems'),
+    ('peopleSkills', 'People & Skills'),
+    ('governanceEthics', 'Governance & Ethics'),
+    ('executionImpact', 'Execution & Impact')
+]
+SEGMENT_COLUMNS = ['industry', 'companySize']
+
+SCORE_DTYPE = np.uint8
+SEGMENT_DTYPE = np.uint32
+# 64-bit hash of each row's identity; 0 marks rows written before identities were kept
+IDENTITY_DTYPE = np.uint64
+
+# Fall back to a broader cohort when the exact segment is too small to be meaningful
+MIN_COHORT = 20
+HISTOGRAM_BINS = 10
+
+def identity_hash(identity):
+    """64-bit row key for a company identity string (never 0)"""
+    return int.from_bytes(hashlib.sha256(identity.encode('utf-8')).digest()[:8], 'big') or 1
+
+class CohortStore:
+    def __init__(self, path, initial_capacity=1 << 16):
+        self.path = path
+        self.initial_capacity = initial_capacity
+        self.lock = threading.Lock()
+        self.maps = {}
+        self.mapped_capacity = 0
+        self.pin = None
+        os.makedirs(path, exist_ok=True)
+
+    def column_path(self, name):
+        return os.path.join(self.path, f'{name}.col')
+
+    def read_meta(self):
+        try:
+            with open(os.path.join(self.path, 'meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'rows': 0, 'capacity': 0, 'industry': [], 'companySize': []}
+
+    def write_meta(self, meta):
+        # Readers only trust rows counted in meta, so it is replaced atomically
+        # after the row data is on disk
+        meta_path = os.path.join(self.path, 'meta.json')
+        tmp_path = f'{meta_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def columns(self):
+        return [(key, SCORE_DTYPE) for key, _ in SCORE_COLUMNS] + \
+               [(key, SEGMENT_DTYPE) for key in SEGMENT_COLUMNS]
+
+    def stored_columns(self):
+        """Query columns plus the identity column, which only append reads"""
+        return self.columns() + [('identity', IDENTITY_DTYPE)]
+
+    def peer_mask(self, rows, identity):
+        """Mask of rows that do not belong to identity, or None if none of them do"""
+        identity_path = self.column_path('identity')
+        if identity is None or not rows or not os.path.exists(identity_path):
+            return None
+        identities = np.memmap(identity_path, dtype=IDENTITY_DTYPE, mode='r', shape=(rows,))
+        peers = identities != identity_hash(identity)
+        return None if peers.all() else peers
+
+    def append(self, readiness, toolbox, identity):
+        """Store the row for identity, built from a ReadinessReport and a ToolboxReport.
+
+        A row already stored for the same identity is overwritten.
+        """
+        row_identity = identity_hash(identity)
+        scores = [readiness.overall_score] + \
+                 [readiness.dimension_scores.get(key, 0) for key, _ in SCORE_COLUMNS[1:]]
+        segments = [toolbox.industry.strip(), toolbox.company_size.strip()]
+
+        with self.lock, open(os.path.join(self.path, 'append.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            meta = self.read_meta()
+            row = meta['rows']
+            identity_path = self.column_path('identity')
+            if not os.path.exists(identity_path):
+                # Stores created before identities were kept get an all-zero identity column
+                with open(identity_path, 'wb') as f:
+                    f.truncate(meta['capacity'] * np.dtype(IDENTITY_DTYPE).itemsize)
+
+            existing = np.empty(0, dtype=np.intp)
+            if row:
+                identities = np.memmap(identity_path, dtype=IDENTITY_DTYPE, mode='r', shape=(row,))
+                existing = np.flatnonzero(identities == row_identity)
+                del identities
+            if existing.size:
+                # Replace this company's earlier row in place
+                row = int(existing[0])
+            elif row >= meta['capacity']:
+                meta['capacity'] = max(self.initial_capacity, meta['capacity'] * 2)
+                for name, dtype in self.stored_columns():
+                    with open(self.column_path(name), 'ab') as f:
+                        f.truncate(meta['capacity'] * np.dtype(dtype).itemsize)
+
+            values = [min(max(int(score), 0), 100) for score in scores]
+            for name, segment in zip(SEGMENT_COLUMNS, segments):
+                if segment not in meta[name]:
+                    meta[name].append(segment)
+                values.append(meta[name].index(segment))
+
+            values.append(row_identity)
+            for (name, dtype), value in zip(self.stored_columns(), values):
+                with open(self.column_path(name), 'r+b') as f:
+                    f.seek(row * np.dtype(dtype).itemsize)
+                    f.write(np.array([value], dtype=dtype).tobytes())
+
+            meta['rows'] = max(meta['rows'], row + 1)
+            self.write_meta(meta)
+
+    def pinned(self, label):
+        """Read-only store holding the rows stored when label was first pinned.
+
+        Only the latest label is kept; pinning a new one removes the others.
+        """
+        with self.lock:
+            if self.pin is not None and self.pin[0] == label:
+                return self.pin[1]
+        path = os.path.join(self.path, 'pinned', label)
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            self.copy_rows(path)
+        store = CohortStore(path)
+        with self.lock:
+            self.pin = (label, store)
+        return store
+
+    def copy_rows(self, path):
+        """Copy the stored rows to a new store at path, unless another worker already has"""
+        pinned_dir = os.path.dirname(path)
+        os.makedirs(pinned_dir, exist_ok=True)
+        with self.lock, open(os.path.join(self.path, 'append.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if os.path.exists(os.path.join(path, 'meta.json')):
+                return
+            meta = self.read_meta()
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            os.makedirs(tmp_path, exist_ok=True)
+            for name, dtype in self.stored_columns():
+                size = meta['rows'] * np.dtype(dtype).itemsize
+                with open(os.path.join(tmp_path, f'{name}.col'), 'wb') as dst:
+                    if os.path.exists(self.column_path(name)):
+                        with open(self.column_path(name), 'rb') as src:
+                            dst.write(src.read(size))
+                    dst.truncate(size)
+            with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+                json.dump(dict(meta, capacity=meta['rows']), f)
+            os.rename(tmp_path, path)
+
+            # Appends hold the same lock, so no other copy is in progress
+            for name in os.listdir(pinned_dir):
+                if name != os.path.basename(path):
+                    shutil.rmtree(os.path.join(pinned_dir, name), ignore_errors=True)
+
+    def snapshot(self):
+        """Return (meta, {column: array of the first meta['rows'] values})"""
+        meta = self.read_meta()
+        with self.lock:
+            if meta['capacity'] != self.mapped_capacity:
+                self.maps = {}
+                if meta['capacity']:
+                    for name, dtype in self.columns():
+                        self.maps[name] = np.memmap(self.column_path(name), dtype=dtype, mode='r',
+                                                    shape=(meta['capacity'],))
+                self.mapped_capacity = meta['capacity']
+            maps = self.maps
+        rows = meta['rows']
+        return meta, {name: column[:rows] for name, column in maps.items()}
+
+    def compare(self, readiness, toolbox, identity=None, min_cohort=MIN_COHORT):
+        """Percentiles of a company's scores among its peers, or None if there are too few.
+
+        The company's own stored row, if identity has one, is left out.
+        """
+        meta, columns = self.snapshot()
+        peers = self.peer_mask(meta['rows'], identity)
+        total = meta['rows'] if peers is None else int(np.count_nonzero(peers))
+        if total < min_cohort:
+            return None
+
+        industry = toolbox.industry.strip()
+        company_size = toolbox.company_size.strip()
+        industry_mask = None
+        if industry in meta['industry']:
+            industry_mask = columns['industry'] == meta['industry'].index(industry)
+            if peers is not None:
+                industry_mask &= peers
+
+        # Narrowest cohort with enough members: industry and size, then industry, then everyone
+        mask, scope, label = None, 'all', 'all companies'
+        if industry_mask is not None and company_size in meta['companySize']:
+            segment_mask = industry_mask & (columns['companySize'] == meta['companySize'].index(company_size))
+            if np.count_nonzero(segment_mask) >= min_cohort:
+                mask, scope, label = segment_mask, 'segment', f'{industry} companies of {company_size} employees'
+        if mask is None and industry_mask is not None and np.count_nonzero(industry_mask) >= min_cohort:
+            mask, scope, label = industry_mask, 'industry', f'{industry} companies'
+        if mask is None:
+            mask = peers
+
+        count = int(np.count_nonzero(mask)) if mask is not None else meta['rows']
+        metrics = []
+        overall_counts = None
+        for key, name in SCORE_COLUMNS:
+            values = columns[key] if mask is None else columns[key][mask]
+            # Scores are 0-100 integers, so one bincount gives every statistic we need
+            counts = np.bincount(values, minlength=101)
+            score = readiness.overall_score if key == 'overallScore' else readiness.dimension_scores.get(key, 0)
+            score = min(max(int(score), 0), 100)
+            below = int(counts[:score].sum())
+            cumulative = np.cumsum(counts)
+            metrics.append({
+                'key': key,
+                'label': name,
+                'score': score,
+                'percentile': round(100 * (below + 0.5 * int(counts[score])) / count),
+                'median': int(np.searchsorted(cumulative, (count + 1) // 2))
+            })
+            if key == 'overallScore':
+                overall_counts = counts
+
+        bin_width = 100 // HISTOGRAM_BINS
+        bins = [int(overall_counts[i * bin_width:(i + 1) * bin_width].sum()) for i in range(HISTOGRAM_BINS)]
+        bins[-1] += int(overall_counts[100])
+        return {
+            'scope': scope,
+            'cohort': label,
+            'count': count,
+            'metrics': metrics,
+            'histogram': {
+                'binWidth': bin_width,
+                'counts': bins,
+                'companyBin': min(metrics[0]['score'] // bin_width, HISTOGRAM_BINS - 1)
+            }
+        }
+
+def bench(rows, path):
+    """Fill a store with random rows and time a comparison query"""
+    store = CohortStore(path, initial_capacity=rows)
+    meta = store.read_meta()
+    if meta['rows'] < rows:
+        rng = np.random.default_rng(1)
+        meta = {
+            'rows': rows,
+            'capacity': rows,
+            'industry': [f'Industry {i}' for i in range(40)],
+            'companySize': ['1-10', '11-50', '51-200', '201-1000', '1000+']
+        }
+        for name, dtype in store.columns():
+            if dtype is SCORE_DTYPE:
+                values = np.clip(rng.normal(55, 18, rows), 0, 100)
+            else:
+                values = rng.integers(0, len(meta[name]), rows)
+            values.astype(dtype).tofile(store.column_path(name))
+        store.write_meta(meta)
+
+    readiness = ReadinessReport(62, dimension_scores=DimensionScores(60, 60, 60, 60, 60))
+    toolbox = ToolboxReport(industry='Industry 7', company_size='51-200')
+    store.compare(readiness, toolbox)
+    start = time.perf_counter()
+    runs = 20
+    for _ in range(runs):
+        result = store.compare(readiness, toolbox)
+    elapsed = (time.perf_counter() - start) / runs
+    print(f'{rows:,} rows, cohort of {result["count"]:,}: {elapsed * 1000:.1f}ms per comparison')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark cohort comparisons')
+    parser.add_argument('--bench', type=int, default=1_000_000, help='number of rows to benchmark with')
+    parser.add_argument('--path', default='/tmp/mesh_cohort_bench', help='store directory for the benchmark')
+    args = parser.parse_args()
+    bench(args.bench, args.path)
@@ -0,0 +1,85 @@
+"""Content-addressed files for split playbook delivery.
+
+In split delivery the client downloads the personalized addendum and the
+shared base playbook separately. Both are addressed by the SHA-256 of
+their contents, so their URLs never change meaning and can be cached
+forever by browsers and CDNs; a new base playbook gets a new URL.
+"""
+import os
+import re
+import time
+import hashlib
+import tempfile
+import threading
+
+DIGEST = re.compile(r'[0-9a-f]{64}')
+
+# Content-addressed responses never change, so clients may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_digest_cache = {}
+_digest_lock = threading.Lock()
+
+def file_digest(path):
+    """SHA-256 hex digest of a file, recomputed only when its size or mtime changes"""
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        cached = _digest_cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    with _digest_lock:
+        _digest_cache[path] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+class AddendumStore:
+    """Generated addenda stored under the hash of their contents.
+
+    Files are kept for `ttl` seconds after they were last written, which is
+    how long manifests handed out to clients stay usable.
+    """
+
+    def __init__(self, path, ttl=24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(path, exist_ok=True)
+
+    def file_path(self, digest):
+        """Path of a stored addendum, or None if digest is malformed or unknown"""
+        if not DIGEST.fullmatch(digest):
+            return None
+        path = os.path.join(self.path, f'{digest}.pdf')
+        return path if os.path.exists(path) else None
+
+    def put(self, data):
+        """Store addendum bytes and return their digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.path, f'{digest}.pdf')
+        if os.path.exists(path):
+            # Identical content: only extend its lifetime
+            os.utime(path)
+        else:
+            fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self.remove_expired()
+        return digest
+
+    def remove_expired(self):
+        cutoff = time.time() - self.ttl
+        try:
+            entries = list(os.scandir(self.path))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,334 @@
+"""Load-test harness for the playbook generator.
+
+Starts the app under gunicorn (or targets an already running server), sends
+concurrent multipart uploads of synthetic readiness/toolbox files to
+/api/generate-playbook and sweeps concurrency levels. Uses only the standard
+library so it can run anywhere the app itself runs.
+
+    python loadtest.py --workers 4 --levels 1,2,4,8,16 --requests 50
+    python loadtest.py --worker-class gthread --threads 4
+    python loadtest.py --url http://127.0.0.1:5000 --levels 8
+"""
+import os
+import sys
+import time
+import random
+import signal
+import asyncio
+import argparse
+import tempfile
+import itertools
+import subprocess
+from urllib.parse import urlsplit
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DIMENSIONS = [
+    ('🧭', 'Strategy & Vision'),
+    ('💾', 'Data & Systems'),
+    ('👥', 'People & Skills'),
+    ('🛡️', 'Governance & Ethics'),
+    ('🚀', 'Execution & Impact')
+]
+
+TOOL_CATEGORIES = ['Productivity', 'Automation', 'Analytics', 'Customer Service', 'Knowledge Management']
+TOOL_PRIORITIES = ['ESSENTIAL', 'RECOMMENDED', 'OPTIONAL']
+
+# ===== SYNTHETIC INPUTS =====
+
+def synthetic_readiness(rng, recommendations=4):
+    """Build a readiness report in the format text_parser expects"""
+    lines = [
+        'AI READINESS ASSESSMENT REPORT',
+        '=' * 40,
+        '',
+        f'Overall AI Readiness Score: {rng.randint(20, 95)}',
+        f'Maturity Level: {rng.choice(["Exploring", "Experimenting", "Scaling", "Leading"])}',
+        'Description: Synthetic organisation generated for load testing.',
+        '',
+        'DIMENSION SCORES',
+        '-' * 16
+    ]
+    for emoji, name in DIMENSIONS:
+        lines += [f'{emoji} {name}', f'Score: {rng.randint(10, 100)}', f'Synthetic detail for {name}.', '']
+    for priority in ('HIGH PRIORITY', 'MEDIUM PRIORITY'):
+        lines += [priority, '-' * len(priority), '']
+        for i in range(1, recommendations + 1):
+            name = rng.choice(DIMENSIONS)[1]
+            lines += [
+                f'{i}. Improve area {i} ({name})',
+                'Close the most visible gap in this dimension.',
+                'Action Items:',
+                '1. Assign an owner',
+                '2. Define a success metric',
+                ''
+            ]
+    lines.append('=' * 40)
+    return '\n'.join(lines)
+
+def synthetic_toolbox(rng, tools=8):
+    """Build a toolbox export in the format text_parser expects"""
+    lines = [
+        'MESH AI TOOLBOX RECOMMENDATIONS',
+        '=' * 40,
+        '',
+        f'AI Readiness Score: {rng.randint(20, 95)}',
+        'Industry: Professional Services',
+        'Company Size: 51-200',
+        'Budget: Moderate',
+        '',
+        'IMPLEMENTATION GUIDANCE',
+        'Start with low-risk productivity tools before tackling data projects.',
+        '=' * 40,
+        '',
+        'RECOMMENDED TOOLS',
+        '-' * 17,
+        ''
+    ]
+    for i in range(1, tools + 1):
+        lines += [
+            f'{i}. Tool {i} [{rng.choice(TOOL_PRIORITIES)}]',
+            f'Match Score: {rng.randint(50, 99)}',
+            f'Category: {rng.choice(TOOL_CATEGORIES)}',
+            f'Website: https://tool{i}.example.com',
+            'Why We Recommend:',
+            '• Fits the current readiness level',
+            '• Low training burden',
+            'Key Features:',
+            '• Shared workspace',
+            '• Admin controls',
+            '• Audit log',
+            'Pricing:',
+            '• Team: $20/user/month',
+            ''
+        ]
+    lines += ['NEXT STEPS', '1. Pilot the essential tools', '2. Draft an AI use policy', '=' * 40]
+    return '\n'.join(lines)
+
+def build_multipart(fields, files):
+    """Encode form fields and (name, filename, bytes) files as multipart/form-data"""
+    boundary = f'----meshload{random.getrandbits(64):016x}'
+    body = bytearray()
+    for name, value in fields.items():
+        body += (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                 f'{value}\r\n').encode('utf-8')
+    for name, filename, content in files:
+        body += (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                 f'Content-Type: text/plain\r\n\r\n').encode('utf-8')
+        body += content + b'\r\n'
+    body += f'--{boundary}--\r\n'.encode('utf-8')
+    return f'multipart/form-data; boundary={boundary}', bytes(body)
+
+# Numbers every request sent, so no two bodies are identical
+request_ids = itertools.count()
+
+def tag_request(content_type, body, request_id):
+    """Prepend a unique form field so the server cannot coalesce this request with another"""
+    boundary = content_type.split('boundary=', 1)[1]
+    field = f'--{boundary}\r\nContent-Disposition: form-data; name="loadTestRequest"\r\n\r\n{request_id}\r\n'
+    return field.encode('utf-8') + body
+
+def build_payloads(count, seed, tools, output_format, delivery='combined'):
+    """Pre-encode request bodies so payload generation is not part of the measurement"""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        fields = {'companyName': f'Load Test {i}', 'format': output_format, 'delivery': delivery}
+        files = [
+            ('readiness_file', 'readiness.txt', synthetic_readiness(rng).encode('utf-8')),
+            ('toolbox_file', 'toolbox.txt', synthetic_toolbox(rng, tools).encode('utf-8'))
+        ]
+        payloads.append(build_multipart(fields, files))
+    return payloads
+
+# ===== HTTP CLIENT =====
+
+async def post(host, port, path, content_type, body, timeout):
+    """Send one POST on a fresh connection and return (status, response bytes)"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        head = (f'POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: {content_type}\r\n'
+                f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n').encode('latin-1')
+        writer.write(head + body)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    status_line = response.split(b'\r\n', 1)[0].split()
+    status = int(status_line[1]) if len(status_line) > 1 else 0
+    return status, response
+
+async def run_level(host, port, path, payloads, concurrency, total, timeout):
+    """Keep `concurrency` requests in flight until `total` have completed"""
+    latencies = []
+    errors = []
+    queue = iter(range(total))
+
+    async def client():
+        for i in queue:
+            content_type, body = payloads[i % len(payloads)]
+            body = tag_request(content_type, body, next(request_ids))
+            start = time.perf_counter()
+            try:
+                status, _ = await post(host, port, path, content_type, body, timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                errors.append(type(e).__name__)
+                continue
+            elapsed = time.perf_counter() - start
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                errors.append(str(status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+# ===== SERVER PROCESS =====
+
+def start_server(port, workers, worker_class, threads, timeout, state_dir):
+    """Start the app under gunicorn and wait until /health answers.
+
+    The cohort store, coalescing files and addenda go under state_dir so
+    synthetic requests never reach the real ones in output/.
+    """
+    env = dict(
+        os.environ,
+        MESH_COHORT_DIR=os.path.join(state_dir, 'cohort'),
+        MESH_SINGLEFLIGHT_DIR=os.path.join(state_dir, 'inflight'),
+        MESH_ADDENDUM_DIR=os.path.join(state_dir, 'addenda')
+    )
+    command = [
+        sys.executable, '-m', 'gunicorn', 'app:app',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--worker-class', worker_class,
+        '--threads', str(threads),
+        '--timeout', str(timeout),
+        '--log-level', 'warning'
+    ]
+    server = subprocess.Popen(command, cwd=BASE_DIR, env=env)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {server.returncode}')
+        try:
+            status = asyncio.run(health(port))
+            if status == 200 and len(worker_pids(server.pid)) >= workers:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError('Server did not become healthy within 30 seconds')
+
+async def health(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET /health HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nConnection: close\r\n\r\n'.encode())
+    response = await reader.read()
+    writer.close()
+    return int(response.split()[1])
+
+def stop_server(server):
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+def worker_pids(parent_pid):
+    """PIDs of the gunicorn workers, found through /proc (Linux only)"""
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces, so parse after the closing parenthesis
+        if int(stat.rsplit(')', 1)[1].split()[1]) == parent_pid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+def rss_mb(pid, field='VmRSS'):
+    """Resident (VmRSS) or peak resident (VmHWM) memory of a process in MB"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+# ===== MAIN =====
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep concurrency levels against /api/generate-playbook')
+    parser.add_argument('--url', help='target an already running server instead of starting gunicorn')
+    parser.add_argument('--port', type=int, default=5055, help='port for the local server (default: 5055)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (default: 2)')
+    parser.add_argument('--worker-class', default='sync', help='gunicorn worker class (default: sync)')
+    parser.add_argument('--threads', type=int, default=1, help='threads per gthread worker (default: 1)')
+    parser.add_argument('--levels', default='1,2,4,8', help='comma separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=40, help='requests per concurrency level (default: 40)')
+    parser.add_argument('--warmup', type=int, default=2, help='unmeasured requests per worker before the sweep')
+    parser.add_argument('--tools', type=int, default=8, help='tools per synthetic toolbox file (default: 8)')
+    parser.add_argument('--format', default='pdf', help='output format field sent with each request')
+    parser.add_argument('--delivery', default='combined', choices=['combined', 'split'],
+                        help='PDF delivery: merged playbook, or addendum plus manifest')
+    parser.add_argument('--timeout', type=float, default=120, help='per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the synthetic inputs')
+    args = parser.parse_args(argv)
+
+    levels = [int(level) for level in args.levels.split(',')]
+    payloads = build_payloads(max(levels) * 2, args.seed, args.tools, args.format, args.delivery)
+
+    server = None
+    state_dir = tempfile.TemporaryDirectory(prefix='mesh-loadtest-')
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = '127.0.0.1', args.port
+        server = start_server(port, args.workers, args.worker_class, args.threads, int(args.timeout),
+                              state_dir.name)
+    path = '/api/generate-playbook'
+
+    try:
+        warmup = args.warmup * (args.workers if server else 1)
+        if warmup:
+            asyncio.run(run_level(host, port, path, payloads, min(warmup, args.workers), warmup, args.timeout))
+
+        print(f'{"conc":>5} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}  worker RSS MB (peak)')
+        for concurrency in levels:
+            latencies, errors, elapsed = asyncio.run(
+                run_level(host, port, path, payloads, concurrency, args.requests, args.timeout)
+            )
+            latencies.sort()
+            done = len(latencies) + len(errors)
+            error_rate = len(errors) / done if done else 0.0
+            rss = ''
+            if server:
+                rss = ' '.join(f'{rss_mb(pid):.0f}({rss_mb(pid, "VmHWM"):.0f})' for pid in worker_pids(server.pid))
+            print(f'{concurrency:>5} {len(latencies) / elapsed:>8.2f} '
+                  f'{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} '
+                  f'{percentile(latencies, 99) * 1000:>8.0f} {error_rate:>6.1%}  {rss}')
+            if errors:
+                kinds = sorted(set(errors))
+                print(f'      error kinds: {", ".join(f"{kind} x{errors.count(kind)}" for kind in kinds)}')
+    finally:
+        if server:
+            stop_server(server)
+        state_dir.cleanup()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+import json
+from datetime import datetime
+from html import escape
+from urllib.parse import urlsplit
+from records import as_readiness, as_toolbox
+
+# Bump when the block structure changes so stale serialized documents are rejected
+DOCUMENT_VERSION = 1
+
+DIMENSION_NAMES = {
+    'strategyVision': 'Strategy & Vision',
+    'dataSystems': 'Data & Systems',
+    'peopleSkills': 'People & Skills',
+    'governanceEthics': 'Governance & Ethics',
+    'executionImpact': 'Execution & Impact'
+}
+
+TOOL_GROUPS = [
+    ('ESSENTIAL', 'Essential Tools'),
+    ('RECOMMENDED', 'Recommended Tools'),
+    ('OPTIONAL', 'Optional Tools')
+]
+
+def build_playbook_document(session_data, clock=datetime.now):
+    """Build the format-independent playbook document from session data.
+
+    The document is made of plain dicts and lists so it can be cached or
+    serialized as JSON and handed to any of the render backends. The
+    readiness and toolbox entries are ReadinessReport and ToolboxReport
+    records; dicts in the older to_dict() layout are converted. clock
+    supplies the generation date, so renders can be made reproducible.
+    """
+    company_name = session_data.get('companyName', 'Your Company')
+    readiness = as_readiness(session_data.get('readiness'))
+    toolbox = as_toolbox(session_data.get('toolbox'))
+    strategic = session_data.get('strategic', {})
+
+    # Extract data
+    overall_score = readiness.overall_score
+    maturity_level = readiness.maturity_level
+    maturity_desc = readiness.maturity_description
+    dimension_scores = readiness.dimension_scores
+    dimension_details = readiness.dimension_details
+
+    industry = toolbox.industry
+    company_size = toolbox.company_size
+    budget = toolbox.budget_range
+    implementation_guidance = toolbox.implementation_guidance
+    recommended_tools = toolbox.recommended_tools
+    next_steps = toolbox.next_steps
+
+    timeline = strategic.get('timeline', 'Standard (3-6 months)')
+    primary_driver = strategic.get('primaryDriver', 'Improve operations')
+
+    # ===== YOUR AI READINESS PROFILE =====
+    summary = [
+        {'type': 'fields', 'items': [
+            {'label': 'Overall Score', 'value': f'{overall_score}/100'},
+            {'label': 'Maturity Stage', 'value': maturity_level}
+        ]}
+    ]
+    if maturity_desc:
+        summary.append({'type': 'paragraph', 'style': 'quote', 'text': maturity_desc})
+
+    readiness_chapter = {
+        'title': 'Your AI Readiness Profile',
+        'blocks': [
+            {'type': 'group', 'title': 'Assessment Summary', 'blocks': summary},
+            {'type': 'chart', 'kind': 'radar', 'dimensionScores': {
+                key: dimension_scores.get(key, 0) for key in DIMENSION_NAMES
+            }},
+            {'type': 'section', 'title': 'Your Dimension Scores', 'blocks': [
+                {'type': 'paragraph', 'style': 'body', 'text':
+                    'Your assessment evaluated five critical dimensions of AI readiness. Here\'s how you scored:'},
+                {'type': 'scores', 'items': [
+                    {'label': name, 'score': dimension_scores.get(key, 0), 'detail': dimension_details.get(key, '')}
+                    for key, name in DIMENSION_NAMES.items()
+                ]}
+            ]}
+        ]
+    }
+
+    # ===== HOW YOU COMPARE =====
+    chapters = [readiness_chapter]
+    benchmark = session_data.get('benchmark')
+    if benchmark:
+        chapters.append({
+            'title': 'How You Compare',
+            'blocks': [
+                {'type': 'paragraph', 'style': 'body', 'text':
+                    f'We compared {company_name}\'s assessment with {benchmark["count"]:,} {benchmark["cohort"]}. '
+                    f'Percentiles show the share of peers scoring below you; the marker on each bar is the peer median.'},
+                {'type': 'comparison', 'items': [dict(metric) for metric in benchmark['metrics']]},
+                {'type': 'section', 'title': 'Overall Score Distribution', 'blocks': [
+                    {'type': 'histogram', 'binWidth': benchmark['histogram']['binWidth'],
+                     'counts': list(benchmark['histogram']['counts']),
+                     'highlight': benchmark['histogram']['companyBin']}
+                ]}
+            ]
+        })
+
+    # ===== YOUR STRATEGIC PROFILE =====
+    strategic_blocks = [
+        {'type': 'paragraph', 'style': 'body', 'text':
+            f'Based on the strategic questions you answered, here is {company_name}\'s AI implementation profile:'},
+        {'type': 'group', 'title': 'Company Overview', 'blocks': [
+            {'type': 'bullets', 'items': [
+                f'Industry: {industry}',
+                f'Company Size: {company_size}',
+                f'Budget Range: {budget}',
+                f'Implementation Timeline: {timeline}',
+                f'Primary Driver: {primary_driver}'
+            ]}
+        ]}
+    ]
+    if implementation_guidance:
+        strategic_blocks.append({'type': 'group', 'title': 'Implementation Guidance', 'blocks': [
+            {'type': 'paragraph', 'style': 'quote', 'text': implementation_guidance}
+        ]})
+    strategic_chapter = {'title': 'Your Strategic Profile', 'blocks': strategic_blocks}
+
+    # ===== YOUR RECOMMENDED AI TOOLKIT =====
+    toolkit_blocks = [
+        {'type': 'paragraph', 'style': 'body', 'text':
+            f'Based on {company_name}\'s profile, readiness score, and business objectives, we recommend '
+            f'the following AI tools as your ideal starting point. These {len(recommended_tools)} tools have been '
+            f'selected to match your industry, budget, and implementation goals.'}
+    ]
+    for priority, label in TOOL_GROUPS:
+        tools = [tool_block(t) for t in recommended_tools if t.priority == priority]
+        if tools:
+            toolkit_blocks.append({'type': 'group', 'title': label, 'blocks': tools})
+    toolkit_chapter = {'title': 'Your Recommended AI Toolkit', 'blocks': toolkit_blocks}
+
+    # ===== YOUR PERSONALIZED ACTION PLAN =====
+    action_blocks = [
+        {'type': 'paragraph', 'style': 'body', 'text':
+            f'This action plan combines insights from your AI Readiness Assessment with the recommended tools '
+            f'to create a clear roadmap for {company_name}\'s AI implementation journey.'}
+    ]
+    if next_steps:
+        action_blocks.append({'type': 'section', 'title': 'Immediate Next Steps', 'blocks': [
+            {'type': 'paragraph', 'style': 'body', 'text': 'Start your AI journey with these concrete actions:'},
+            {'type': 'steps', 'items': list(next_steps)}
+        ]})
+
+    high_priority = readiness.high_priority
+    if high_priority:
+        action_blocks.append({'type': 'section', 'title': 'High Priority Recommendations', 'blocks': [
+            {'type': 'paragraph', 'style': 'body', 'text':
+                'Based on your assessment scores, these are the most critical areas to address:'}
+        ] + [recommendation_block(rec, 'high') for rec in high_priority[:4]]})
+
+    medium_priority = readiness.medium_priority
+    if medium_priority:
+        action_blocks.append({'type': 'section', 'title': 'Medium Priority Recommendations', 'blocks': [
+            {'type': 'paragraph', 'style': 'body', 'text':
+                'Once high-priority items are underway, focus on these areas:'}
+        ] + [recommendation_block(rec, 'medium') for rec in medium_priority[:3]]})
+    action_chapter = {'title': 'Your Personalized Action Plan', 'blocks': action_blocks}
+
+    return {
+        'version': DOCUMENT_VERSION,
+        'companyName': company_name,
+        'generated': clock().strftime('%B %d, %Y'),
+        'chapters': chapters + [strategic_chapter, toolkit_chapter, action_chapter]
+    }
+
+def tool_block(tool):
+    """Select the parts of a parsed tool that appear in the playbook"""
+    return {
+        'type': 'tool',
+        'name': tool.name or 'Tool',
+        'category': tool.category,
+        'matchScore': tool.match_score,
+        'whyRecommend': list(tool.why_recommend),
+        'keyFeatures': list(tool.key_features[:5]),
+        'pricing': list(tool.pricing),
+        'website': tool.website
+    }
+
+def recommendation_block(rec, priority):
+    """Select the parts of a parsed recommendation that appear in the playbook"""
+    title = rec.title or 'Recommendation'
+    if rec.dimension:
+        title += f' ({rec.dimension})'
+    return {
+        'type': 'recommendation',
+        'priority': priority,
+        'title': title,
+        'description': rec.description,
+        # Only high priority items are detailed down to their action items
+        'actionItems': list(rec.action_items) if priority == 'high' else []
+    }
+
+def ordinal(number):
+    """1 -> '1st', 62 -> '62nd', 13 -> '13th'"""
+    if 10 <= number % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')
+    return f'{number}{suffix}'
+
+def histogram_rows(block):
+    """Yield (range label, count, is the company's bin) for a histogram block"""
+    width = block['binWidth']
+    last = len(block['counts']) - 1
+    for i, count in enumerate(block['counts']):
+        upper = 100 if i == last else (i + 1) * width - 1
+        yield f'{i * width}-{upper}', count, i == block['highlight']
+
+def serialize_document(document):
+    """Serialize a playbook document to JSON"""
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+
+def deserialize_document(payload):
+    """Load a playbook document serialized with serialize_document"""
+    document = json.loads(payload)
+    if document.get('version') != DOCUMENT_VERSION:
+        raise ValueError(f'Unsupported playbook document version: {document.get("version")}')
+    return document
+
+# ===== MARKDOWN BACKEND =====
+
+def render_markdown(document):
+    """Render a playbook document as Markdown"""
+    lines = [
+        '# Your Personalized AI Implementation Guide',
+        '',
+        f'**{document["companyName"]}**',
+        '',
+        '*Powered by MESH - whenwemesh.com*  ',
+        f'*Generated: {document["generated"]}*',
+        ''
+    ]
+    for chapter in document['chapters']:
+        lines.append(f'## {chapter["title"]}')
+        lines.append('')
+        for block in chapter['blocks']:
+            render_markdown_block(block, lines, 3)
+    return '\n'.join(lines).rstrip() + '\n'
+
+def render_markdown_block(block, lines, level):
+    kind = block['type']
+    if kind in ('section', 'group'):
+        lines.append(f'{"#" * level} {block["title"]}')
+        lines.append('')
+        for child in block['blocks']:
+            render_markdown_block(child, lines, level + 1)
+        return
+
+    if kind == 'paragraph':
+        if block['style'] == 'quote':
+            lines.append(f'> {block["text"]}')
+        else:
+            lines.append(block['text'])
+    elif kind == 'fields':
+        for item in block['items']:
+            lines.append(f'- **{item["label"]}:** {item["value"]}')
+    elif kind == 'chart':
+        lines.append('| Dimension | Score |')
+        lines.append('| --- | --- |')
+        for key, name in DIMENSION_NAMES.items():
+            lines.append(f'| {name} | {block["dimensionScores"].get(key, 0)}/100 |')
+    elif kind == 'comparison':
+        lines.append('| Dimension | Your Score | Percentile | Peer Median |')
+        lines.append('| --- | --- | --- | --- |')
+        for item in block['items']:
+            lines.append(f'| {item["label"]} | {item["score"]}/100 | {ordinal(item["percentile"])} | {item["median"]}/100 |')
+    elif kind == 'histogram':
+        lines.append('| Overall Score | Companies |')
+        lines.append('| --- | --- |')
+        for label, count, highlight in histogram_rows(block):
+            marker = ' **(you)**' if highlight else ''
+            lines.append(f'| {label}{marker} | {count:,} |')
+    elif kind == 'scores':
+        for i, item in enumerate(block['items']):
+            if i:
+                lines.append('')
+            lines.append(f'**{item["label"]}: {item["score"]}/100**  ')
+            if item['detail']:
+                lines.append(item['detail'])
+    elif kind == 'bullets':
+        lines.extend(f'- {item}' for item in block['items'])
+    elif kind == 'steps':
+        lines.extend(f'{i}. {step}' for i, step in enumerate(block['items'], 1))
+    elif kind == 'tool':
+        lines.append(f'{"#" * level} {block["name"]}')
+        lines.append('')
+        lines.append(f'*Category: {block["category"]} | Match Score: {block["matchScore"]}/100*')
+        for label, key in [('Why We Recommend', 'whyRecommend'), ('Key Features', 'keyFeatures'),
+                           ('Pricing', 'pricing')]:
+            if block[key]:
+                lines.append('')
+                lines.append(f'**{label}:**')
+                lines.extend(f'- {item}' for item in block[key])
+        if block['website']:
+            lines.append('')
+            lines.append(f'Website: {block["website"]}')
+    elif kind == 'recommendation':
+        lines.append(f'{"#" * level} {block["title"]}')
+        lines.append('')
+        if block['description']:
+            lines.append(block['description'])
+        if block['actionItems']:
+            lines.append('')
+            lines.append('**Action Items:**')
+            lines.extend(f'- {action}' for action in block['actionItems'])
+    lines.append('')
+
+# ===== HTML BACKEND =====
+
+HTML_STYLE = (
+    'body{font-family:Helvetica,Arial,sans-serif;font-size:14px;color:#000;max-width:760px;margin:0 auto;padding:24px}'
+    'h1,h2,h3{color:rgb(80,20,30)}h4,h5{color:rgb(120,30,40);margin-bottom:4px}'
+    '.company{color:rgb(240,100,60);font-size:22px;font-weight:bold}'
+    '.muted{color:rgb(100,100,100);font-style:italic}'
+    'blockquote{color:rgb(120,30,40);font-style:italic;margin:8px 0}'
+    'li::marker{color:rgb(240,100,60)}'
+    '.tool h5{color:rgb(240,100,60);font-size:17px}'
+    '.bar{background:rgb(230,230,240);height:10px;margin:2px 0 8px}'
+    '.bar span{display:block;height:10px;background:rgb(240,100,60)}'
+    '.bar{position:relative}.bar .median{position:absolute;top:-2px;width:2px;height:14px;background:rgb(80,20,30)}'
+    '.histogram{width:100%}.histogram td:first-child{width:60px}.histogram td:last-child{width:70px;text-align:right}'
+    '.histogram .bar span{background:rgb(200,200,200)}.histogram .you .bar span{background:rgb(240,100,60)}'
+    '.histogram .you td{font-weight:bold}'
+)
+
+def render_html(document):
+    """Render a playbook document as a standalone HTML page"""
+    company_name = escape(document['companyName'])
+    parts = [
+        '<!DOCTYPE html>',
+        '<html><head><meta charset="utf-8">',
+        f'<title>{company_name} - AI Implementation Guide</title>',
+        f'<style>{HTML_STYLE}</style>',
+        '</head><body>',
+        '<h1>Your Personalized AI Implementation Guide</h1>',
+        f'<p class="company">{company_name}</p>',
+        f'<p class="muted">Powered by MESH - whenwemesh.com<br>Generated: {escape(document["generated"])}</p>'
+    ]
+    for chapter in document['chapters']:
+        parts.append(f'<h2>{escape(chapter["title"])}</h2>')
+        for block in chapter['blocks']:
+            render_html_block(block, parts, 3)
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+def html_list(items, tag='ul'):
+    return f'<{tag}>' + ''.join(f'<li>{escape(item)}</li>' for item in items) + f'</{tag}>'
+
+def render_html_block(block, parts, level):
+    kind = block['type']
+    if kind in ('section', 'group'):
+        parts.append(f'<h{level}>{escape(block["title"])}</h{level}>')
+        for child in block['blocks']:
+            render_html_block(child, parts, min(level + 1, 6))
+    elif kind == 'paragraph':
+        if block['style'] == 'quote':
+            parts.append(f'<blockquote>&ldquo;{escape(block["text"])}&rdquo;</blockquote>')
+        else:
+            parts.append(f'<p>{escape(block["text"])}</p>')
+    elif kind == 'fields':
+        parts.append('<p>' + '<br>'.join(
+            f'{escape(item["label"])}: <strong>{escape(str(item["value"]))}</strong>'
+            for item in block['items']
+        ) + '</p>')
+    elif kind == 'chart':
+        # Plain bars keep the page free of images so it renders in any mail client
+        for key, name in DIMENSION_NAMES.items():
+            score = block['dimensionScores'].get(key, 0)
+            width = max(0, min(int(score), 100))
+            parts.append(f'<div>{escape(name)}: {score}/100</div>'
+                         f'<div class="bar"><span style="width:{width}%"></span></div>')
+    elif kind == 'comparison':
+        for item in block['items']:
+            width = max(0, min(int(item['score']), 100))
+            parts.append(f'<div>{escape(item["label"])}: {item["score"]}/100 &middot; '
+                         f'{ordinal(item["percentile"])} percentile (peer median {item["median"]})</div>'
+                         f'<div class="bar"><span style="width:{width}%"></span>'
+                         f'<i class="median" style="left:{item["median"]}%"></i></div>')
+    elif kind == 'histogram':
+        peak = max(block['counts']) or 1
+        parts.append('<table class="histogram">')
+        for label, count, highlight in histogram_rows(block):
+            css = ' class="you"' if highlight else ''
+            parts.append(f'<tr{css}><td>{label}</td><td><div class="bar"><span style="width:{100 * count / peak:.1f}%">'
+                         f'</span></div></td><td>{count:,}</td></tr>')
+        parts.append('</table>')
+    elif kind == 'scores':
+        for item in block['items']:
+            parts.append(f'<h{level}>{escape(item["label"])}: {item["score"]}/100</h{level}>')
+            if item['detail']:
+                parts.append(f'<p>{escape(item["detail"])}</p>')
+    elif kind == 'bullets':
+        parts.append(html_list(block['items']))
+    elif kind == 'steps':
+        parts.append(html_list(block['items'], 'ol'))
+    elif kind == 'tool':
+        parts.append('<div class="tool">')
+        parts.append(f'<h{level}>{escape(block["name"])}</h{level}>')
+        parts.append(f'<p class="muted">Category: {escape(block["category"])} | '
+                     f'Match Score: {block["matchScore"]}/100</p>')
+        for label, key in [('Why We Recommend', 'whyRecommend'), ('Key Features', 'keyFeatures'),
+                           ('Pricing', 'pricing')]:
+            if block[key]:
+                parts.append(f'<strong>{label}:</strong>{html_list(block[key])}')
+        if block['website']:
+            website = escape(block['website'])
+            # Uploaded text; only web URLs become links (no javascript: or data: hrefs)
+            if urlsplit(block['website'].strip()).scheme.lower() in ('http', 'https'):
+                website = f'<a href="{website}">{website}</a>'
+            parts.append(f'<p class="muted">Website: {website}</p>')
+        parts.append('</div>')
+    elif kind == 'recommendation':
+        parts.append(f'<h{level}>{escape(block["title"])}</h{level}>')
+        if block['description']:
+            parts.append(f'<p>{escape(block["description"])}</p>')
+        if block['actionItems']:
+            parts.append(f'<strong>Action Items:</strong>{html_list(block["actionItems"])}')
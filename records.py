@@ -0,0 +1,283 @@
+"""Typed records for parsed readiness reports and toolbox exports.
+
+Records use __slots__ instead of per-instance dicts, keep their sequences
+as tuples, and intern the strings that repeat across customers
+(priorities, categories, dimensions, industries), so a parsed session
+held in a cache or session store takes a fraction of the memory of the
+nested dicts the parser used to return.
+
+to_dict() and from_dict() convert to and from the original dict layout,
+which is still what JSON output and older callers use. to_bytes() and
+from_bytes() are a compact binary form for caches; they rely on marshal,
+so only load bytes that this application wrote itself.
+"""
+import sys
+import marshal
+
+# Bump when a record's field layout changes so stale cached bytes are rejected
+RECORD_FORMAT = 3
+BINARY_HEADER = b'MR' + bytes([RECORD_FORMAT, marshal.version])
+
+def intern(value):
+    return sys.intern(value) if value else ''
+
+class Record:
+    """Base class giving slotted records equality and a readable repr"""
+    __slots__ = ()
+    fields = ()
+    binary_header = BINARY_HEADER
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Subclasses such as DimensionDetails add no slots of their own
+        cls.fields = cls.fields + tuple(cls.__dict__.get('__slots__', ()))
+        # Bytes name their record type, so they cannot be loaded as another one
+        cls.binary_header = BINARY_HEADER + cls.__name__.encode('ascii') + b'\0'
+
+    def astuple(self):
+        return tuple(getattr(self, name) for name in self.fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.astuple() == other.astuple()
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.fields)
+        return f'{type(self).__name__}({fields})'
+
+    def to_bytes(self):
+        """Compact binary form of this record, for caches"""
+        return self.binary_header + marshal.dumps(self.to_row())
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(cls.binary_header)] != cls.binary_header:
+            raise ValueError(f'Not a {cls.__name__} written by this record format')
+        return cls.from_row(marshal.loads(data[len(cls.binary_header):]))
+
+# ===== DIMENSIONS =====
+
+# (attribute, dict key) for the five readiness dimensions, in report order
+DIMENSION_KEYS = (
+    ('strategy_vision', 'strategyVision'),
+    ('data_systems', 'dataSystems'),
+    ('people_skills', 'peopleSkills'),
+    ('governance_ethics', 'governanceEthics'),
+    ('execution_impact', 'executionImpact')
+)
+DIMENSION_ATTRIBUTES = {key: attribute for attribute, key in DIMENSION_KEYS}
+
+class DimensionScores(Record):
+    """One 0-100 score per readiness dimension"""
+    __slots__ = tuple(attribute for attribute, _ in DIMENSION_KEYS)
+    missing = 0
+
+    def __init__(self, strategy_vision=None, data_systems=None, people_skills=None,
+                 governance_ethics=None, execution_impact=None):
+        self.strategy_vision = self.missing if strategy_vision is None else strategy_vision
+        self.data_systems = self.missing if data_systems is None else data_systems
+        self.people_skills = self.missing if people_skills is None else people_skills
+        self.governance_ethics = self.missing if governance_ethics is None else governance_ethics
+        self.execution_impact = self.missing if execution_impact is None else execution_impact
+
+    def get(self, key, default=None):
+        """Value for a camelCase dimension key such as 'dataSystems'"""
+        value = getattr(self, DIMENSION_ATTRIBUTES[key], None) if key in DIMENSION_ATTRIBUTES else None
+        return default if value is None else value
+
+    def set(self, key, value):
+        setattr(self, DIMENSION_ATTRIBUTES[key], value)
+
+    def to_dict(self):
+        return {key: getattr(self, attribute) for attribute, key in DIMENSION_KEYS
+                if getattr(self, attribute) is not None}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{attribute: data.get(key) for attribute, key in DIMENSION_KEYS})
+
+    def to_row(self):
+        return self.astuple()
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+class DimensionDetails(DimensionScores):
+    """One line of commentary per dimension; dimensions the report skipped are None"""
+    __slots__ = ()
+    missing = None
+
+# ===== READINESS REPORT =====
+
+class Recommendation(Record):
+    __slots__ = ('title', 'dimension', 'description', 'action_items')
+
+    def __init__(self, title, dimension='', description='', action_items=()):
+        self.title = title
+        self.dimension = intern(dimension)
+        self.description = description
+        self.action_items = tuple(action_items)
+
+    def to_dict(self):
+        return {
+            'title': self.title,
+            'dimension': self.dimension,
+            'description': self.description,
+            'actionItems': list(self.action_items)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('title', ''), data.get('dimension', ''), data.get('description', ''),
+                   data.get('actionItems', ()))
+
+    def to_row(self):
+        return self.astuple()
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+class ReadinessReport(Record):
+    __slots__ = ('overall_score', 'maturity_level', 'maturity_description', 'dimension_scores',
+                 'dimension_details', 'high_priority', 'medium_priority')
+
+    def __init__(self, overall_score=0, maturity_level='Exploring', maturity_description='',
+                 dimension_scores=None, dimension_details=None, high_priority=(), medium_priority=()):
+        self.overall_score = overall_score
+        self.maturity_level = intern(maturity_level)
+        self.maturity_description = maturity_description
+        self.dimension_scores = dimension_scores or DimensionScores()
+        self.dimension_details = dimension_details or DimensionDetails()
+        self.high_priority = tuple(high_priority)
+        self.medium_priority = tuple(medium_priority)
+
+    def to_dict(self):
+        return {
+            'overallScore': self.overall_score,
+            'maturityLevel': self.maturity_level,
+            'maturityDescription': self.maturity_description,
+            'dimensionScores': self.dimension_scores.to_dict(),
+            'dimensionDetails': self.dimension_details.to_dict(),
+            'recommendations': {
+                'high': [rec.to_dict() for rec in self.high_priority],
+                'medium': [rec.to_dict() for rec in self.medium_priority]
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        recommendations = data.get('recommendations', {})
+        return cls(
+            data.get('overallScore', 0),
+            data.get('maturityLevel', 'Exploring'),
+            data.get('maturityDescription', ''),
+            DimensionScores.from_dict(data.get('dimensionScores', {})),
+            DimensionDetails.from_dict(data.get('dimensionDetails', {})),
+            [Recommendation.from_dict(rec) for rec in recommendations.get('high', [])],
+            [Recommendation.from_dict(rec) for rec in recommendations.get('medium', [])]
+        )
+
+    def to_row(self):
+        return (self.overall_score, self.maturity_level, self.maturity_description,
+                self.dimension_scores.to_row(), self.dimension_details.to_row(),
+                tuple(rec.to_row() for rec in self.high_priority),
+                tuple(rec.to_row() for rec in self.medium_priority))
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row[0], row[1], row[2], DimensionScores.from_row(row[3]), DimensionDetails.from_row(row[4]),
+                   [Recommendation.from_row(rec) for rec in row[5]],
+                   [Recommendation.from_row(rec) for rec in row[6]])
+
+# ===== TOOLBOX REPORT =====
+
+class Tool(Record):
+    __slots__ = ('name', 'priority', 'match_score', 'category', 'website',
+                 'why_recommend', 'key_features', 'pricing')
+
+    def __init__(self, name, priority='', match_score=0, category='', website='',
+                 why_recommend=(), key_features=(), pricing=()):
+        self.name = intern(name)
+        self.priority = intern(priority)
+        self.match_score = match_score
+        self.category = intern(category)
+        self.website = intern(website)
+        self.why_recommend = tuple(why_recommend)
+        # Features and pricing come from the toolbox catalogue, so they repeat across customers
+        self.key_features = tuple(intern(feature) for feature in key_features)
+        self.pricing = tuple(intern(tier) for tier in pricing)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'priority': self.priority,
+            'matchScore': self.match_score,
+            'category': self.category,
+            'website': self.website,
+            'whyRecommend': list(self.why_recommend),
+            'keyFeatures': list(self.key_features),
+            'pricing': list(self.pricing)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('name', ''), data.get('priority', ''), data.get('matchScore', 0),
+                   data.get('category', ''), data.get('website', ''), data.get('whyRecommend', ()),
+                   data.get('keyFeatures', ()), data.get('pricing', ()))
+
+    def to_row(self):
+        return self.astuple()
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+class ToolboxReport(Record):
+    __slots__ = ('readiness_score', 'industry', 'company_size', 'budget_range',
+                 'implementation_guidance', 'recommended_tools', 'next_steps')
+
+    def __init__(self, readiness_score=0, industry='', company_size='', budget_range='',
+                 implementation_guidance='', recommended_tools=(), next_steps=()):
+        self.readiness_score = readiness_score
+        self.industry = intern(industry)
+        self.company_size = intern(company_size)
+        self.budget_range = intern(budget_range)
+        self.implementation_guidance = implementation_guidance
+        self.recommended_tools = tuple(recommended_tools)
+        self.next_steps = tuple(next_steps)
+
+    def to_dict(self):
+        return {
+            'readinessScore': self.readiness_score,
+            'industry': self.industry,
+            'companySize': self.company_size,
+            'budgetRange': self.budget_range,
+            'implementationGuidance': self.implementation_guidance,
+            'recommendedTools': [tool.to_dict() for tool in self.recommended_tools],
+            'nextSteps': list(self.next_steps)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('readinessScore', 0), data.get('industry', ''), data.get('companySize', ''),
+                   data.get('budgetRange', ''), data.get('implementationGuidance', ''),
+                   [Tool.from_dict(tool) for tool in data.get('recommendedTools', [])],
+                   data.get('nextSteps', ()))
+
+    def to_row(self):
+        return (self.readiness_score, self.industry, self.company_size, self.budget_range,
+                self.implementation_guidance, tuple(tool.to_row() for tool in self.recommended_tools),
+                self.next_steps)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row[:5], [Tool.from_row(tool) for tool in row[5]], row[6])
+
+def as_readiness(data):
+    """Accept a ReadinessReport or the legacy dict layout"""
+    return data if isinstance(data, ReadinessReport) else ReadinessReport.from_dict(data or {})
+
+def as_toolbox(data):
+    """Accept a ToolboxReport or the legacy dict layout"""
+    return data if isinstance(data, ToolboxReport) else ToolboxReport.from_dict(data or {})
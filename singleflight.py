@@ -0,0 +1,177 @@
+import os
+import time
+import fcntl
+import hashlib
+import tempfile
+import threading
+
+def request_key(contents, fields):
+    """Hash uploaded file contents plus form fields into a coalescing key"""
+    digest = hashlib.sha256()
+    for content in contents:
+        # Length prefixes keep ('ab', 'c') and ('a', 'bc') apart
+        digest.update(len(content).to_bytes(8, 'big'))
+        digest.update(content)
+    for name, value in sorted(fields.items()):
+        item = f'{name}={value}'.encode('utf-8')
+        digest.update(len(item).to_bytes(8, 'big'))
+        digest.update(item)
+    return digest.hexdigest()
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesce identical concurrent calls so only one of them does the work.
+
+    Within a process, duplicates wait on the leader's Flight and share its
+    result. Across worker processes on the same host, leaders serialize on
+    an flock'd file per key in `lock_dir`. A process that has to wait for
+    the lock leaves a marker file while it waits; the leader writes its
+    result next to the lock, and the result is deleted as soon as no
+    marked waiters remain. Only calls that arrived while another was in
+    flight share its result, so this is not a response cache. Results must
+    be bytes. Files older than `stale_after` seconds (left by crashed
+    processes) are removed.
+    """
+
+    def __init__(self, lock_dir, stale_after=300):
+        self.lock_dir = lock_dir
+        self.stale_after = stale_after
+        self.flights = {}
+        self.lock = threading.Lock()
+        os.makedirs(lock_dir, exist_ok=True)
+
+    def do(self, key, fn):
+        """Return fn()'s result, sharing it with concurrent calls for the same key"""
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self.do_across_workers(key, fn)
+            return flight.result
+        except BaseException as e:
+            # SystemExit (a gunicorn worker timeout) and the like reach waiters as ordinary errors
+            flight.error = e if isinstance(e, Exception) else \
+                RuntimeError(f'Coalesced call was interrupted by {type(e).__name__}')
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def do_across_workers(self, key, fn):
+        lock_path = os.path.join(self.lock_dir, f'{key}.lock')
+        result_path = os.path.join(self.lock_dir, f'{key}.result')
+        lock_file, waited = self.acquire_file_lock(lock_path, key)
+        try:
+            if waited:
+                # Another worker held the lock when we arrived; share its result if it succeeded
+                result = self.read_result(result_path)
+                if result is not None:
+                    return result
+
+            result = fn()
+            fd, tmp_path = tempfile.mkstemp(dir=self.lock_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(result)
+            os.replace(tmp_path, result_path)
+            return result
+        finally:
+            # Still holding the lock: drop the result once nobody is waiting for it
+            if not self.has_waiters(key):
+                try:
+                    os.remove(result_path)
+                except OSError:
+                    pass
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+            self.remove_stale_files()
+
+    def acquire_file_lock(self, lock_path, key):
+        """Open and flock lock_path, retrying if it was unlinked while we waited.
+
+        Returns (lock_file, waited), where waited tells whether another
+        process held the lock when we arrived.
+        """
+        marker_path = os.path.join(self.lock_dir, f'{key}.{os.getpid()}.wait')
+        # The marker exists before we try the lock, so a leader finishing
+        # while we wait keeps its result for us
+        open(marker_path, 'a').close()
+        waited = False
+        try:
+            while True:
+                lock_file = open(lock_path, 'a')
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    waited = True
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    if os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino:
+                        os.utime(lock_path)
+                        return lock_file, waited
+                except FileNotFoundError:
+                    pass
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+        finally:
+            try:
+                os.remove(marker_path)
+            except OSError:
+                pass
+
+    def has_waiters(self, key):
+        prefix = f'{key}.'
+        try:
+            return any(entry.name.startswith(prefix) and entry.name.endswith('.wait')
+                       for entry in os.scandir(self.lock_dir))
+        except OSError:
+            return False
+
+    def read_result(self, result_path):
+        try:
+            with open(result_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def remove_stale_files(self):
+        """Delete results, markers and locks left over by crashed or earlier requests"""
+        cutoff = time.time() - self.stale_after
+        try:
+            entries = list(os.scandir(self.lock_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                if entry.name.endswith('.lock'):
+                    self.remove_idle_lock(entry.path)
+                else:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def remove_idle_lock(self, lock_path):
+        # Only unlink a lock nobody holds; waiters notice the new inode and retry
+        with open(lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            if os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino:
+                os.remove(lock_path)
@@ -1,95 +1,198 @@
 import re
+import os
+import sys
 import json
+import time
+import zlib
+import tarfile
+import argparse
+from multiprocessing import Pool
+from records import ReadinessReport, DimensionScores, DimensionDetails, Recommendation, ToolboxReport, Tool
 
-def parse_readiness_assessment(content):
+# Upper bounds on parse cost. Every pattern below runs in time linear in the
+# input, so together these bound the worst case for any input.
+MAX_PARSE_CHARS = 1_000_000
+PARSE_TIME_BUDGET = 2.0  # seconds
+
+class ParseBudgetExceeded(ValueError):
+    """Raised when an input is too large or takes too long to parse"""
+
+class ParseBudget:
+    def __init__(self, seconds=PARSE_TIME_BUDGET):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+    
+    def check(self, stage):
+        if time.monotonic() > self.deadline:
+            raise ParseBudgetExceeded(
+                f'Parsing exceeded the {self.seconds:g}s time budget while reading {stage}'
+            )
+
+# Section boundaries. Headings are located first and the section end is found
+# with a single forward search, instead of lazy DOTALL scans that rescan the
+# rest of the document for every candidate start.
+HIGH_PRIORITY_HEAD = re.compile(r'HIGH PRIORITY\s*+-++\s*+', re.IGNORECASE)
+MEDIUM_PRIORITY_HEAD = re.compile(r'MEDIUM PRIORITY\s*+-++\s*+', re.IGNORECASE)
+HIGH_PRIORITY_END = re.compile(r'MEDIUM PRIORITY|={3}', re.IGNORECASE)
+MEDIUM_PRIORITY_END = re.compile(r'={3}')
+GUIDANCE_HEAD = re.compile(r'IMPLEMENTATION GUIDANCE\s*+', re.IGNORECASE)
+TOOLS_HEAD = re.compile(r'RECOMMENDED TOOLS', re.IGNORECASE)
+TOOLS_END = re.compile(r'={3}|BUDGET PLANNING|NEXT STEPS', re.IGNORECASE)
+NEXT_STEPS_HEAD = re.compile(r'NEXT STEPS\s*+', re.IGNORECASE)
+LEADING_SPACE = re.compile(r'\s*+')
+
+# A numbered item starts at the first newline of a whitespace run; anchoring on
+# the start of the run keeps the engine from rescanning it from every newline
+RECOMMENDATION_SPLIT = re.compile(r'(?<!\s)([^\S\n]*+)\n\s*+\d++\.\s+')
+NUMBERED_STEP = re.compile(r'(?<!\d)\d++\.\s*([^\n]+)')
+
+DIMENSION_NAMES = {
+    'strategyVision': r'Strategy\s*+&\s*+Vision',
+    'dataSystems': r'Data\s*+&\s*+Systems',
+    'peopleSkills': r'People\s*+&\s*+Skills',
+    'governanceEthics': r'Governance\s*+&\s*+Ethics',
+    'executionImpact': r'Execution\s*+&\s*+Impact'
+}
+DIMENSION_PATTERNS = {key: re.compile(name, re.IGNORECASE) for key, name in DIMENSION_NAMES.items()}
+SCORE_LINE = re.compile(r'\s*+Score:\s*+(\d++)', re.IGNORECASE)
+
+def find_dimension(content, name, budget):
+    """Return (score, detail) for a dimension, either of which may be None.
+
+    Gives the same result as searching for name[^\n]*\n\s*Score:\s*(\d+),
+    and for the detail that pattern plus [^\n]*\n([^\n]+), including names
+    split across lines. Occurrences that end on the same line share one
+    check of what follows that line, so repeated names on one long line
+    stay linear.
+    """
+    score = None
+    line_end = -1
+    for match in name.finditer(content):
+        if match.end() <= line_end:
+            continue
+        line_end = content.find('\n', match.end())
+        if line_end == -1:
+            break
+        budget.check('dimension scores')
+        score_match = SCORE_LINE.match(content, line_end + 1)
+        if score_match is None:
+            continue
+        if score is None:
+            score = int(score_match.group(1))
+        
+        # The detail is the (non-empty) line after the score line
+        detail_start = content.find('\n', score_match.end()) + 1
+        if 0 < detail_start < len(content) and content[detail_start] != '\n':
+            detail_end = content.find('\n', detail_start)
+            if detail_end == -1:
+                detail_end = len(content)
+            return score, content[detail_start:detail_end].strip()
+    return score, None
+
+def find_section(content, head, end, to_end_of_text=False):
+    """Return the text between the first match of head and the next match of end"""
+    head_match = head.search(content)
+    if not head_match or head_match.end() >= len(content):
+        return None
+    start = head_match.end()
+    end_match = end.search(content, start + 1)
+    if end_match:
+        return content[start:end_match.start()]
+    if not to_end_of_text:
+        return None
+    # Like $, stop before a single trailing newline
+    if content.endswith('\n') and len(content) - 1 > start:
+        return content[start:-1]
+    return content[start:]
+
+def split_trailing_group(line, open_char, close_char):
+    """Split 'Title (Group)' style lines into (title, group) in one pass.
+
+    Equivalent to re.match(r'(.+?)\\s*\\(([^)]+)\\)', line) but linear even
+    for lines full of unbalanced brackets.
+    """
+    close = -1
+    start = line.find(open_char, 1)
+    while start != -1:
+        if close <= start:
+            close = line.find(close_char, start + 1)
+            if close == -1:
+                return None
+        if close > start + 1:
+            return line[:max(start, 1)].strip(), line[start + 1:close].strip()
+        start = line.find(open_char, start + 1)
+    return None
+
+def parse_readiness_assessment(content, budget=None):
     """Parse the AI Readiness Assessment report format"""
-    data = {
-        'overallScore': 0,
-        'maturityLevel': 'Exploring',
-        'maturityDescription': '',
-        'dimensionScores': {
-            'strategyVision': 0,
-            'dataSystems': 0,
-            'peopleSkills': 0,
-            'governanceEthics': 0,
-            'executionImpact': 0
-        },
-        'dimensionDetails': {},
-        'recommendations': {
-            'high': [],
-            'medium': []
-        }
-    }
+    budget = budget or ParseBudget()
+    report = ReadinessReport(dimension_scores=DimensionScores(), dimension_details=DimensionDetails())
     
     # Extract overall score
     overall_match = re.search(r'Overall AI Readiness Score:\s*(\d+)', content, re.IGNORECASE)
     if overall_match:
-        data['overallScore'] = int(overall_match.group(1))
+        report.overall_score = int(overall_match.group(1))
     
     # Extract maturity level
     maturity_match = re.search(r'Maturity Level:\s*([^\n]+)', content, re.IGNORECASE)
     if maturity_match:
-        data['maturityLevel'] = maturity_match.group(1).strip()
+        report.maturity_level = sys.intern(maturity_match.group(1).strip())
     
     # Extract maturity description
     desc_match = re.search(r'Description:\s*([^\n]+)', content, re.IGNORECASE)
     if desc_match:
-        data['maturityDescription'] = desc_match.group(1).strip()
+        report.maturity_description = desc_match.group(1).strip()
     
-    # Extract dimension scores with emojis and descriptions
-    dimension_patterns = {
-        'strategyVision': r'(?:🧭\s*)?Strategy\s*&\s*Vision[^\n]*\n\s*Score:\s*(\d+)',
-        'dataSystems': r'(?:💾\s*)?Data\s*&\s*Systems[^\n]*\n\s*Score:\s*(\d+)',
-        'peopleSkills': r'(?:👥\s*)?People\s*&\s*Skills[^\n]*\n\s*Score:\s*(\d+)',
-        'governanceEthics': r'(?:🛡️\s*)?Governance\s*&\s*Ethics[^\n]*\n\s*Score:\s*(\d+)',
-        'executionImpact': r'(?:🚀\s*)?Execution\s*&\s*Impact[^\n]*\n\s*Score:\s*(\d+)'
-    }
-    
-    for dim_key, pattern in dimension_patterns.items():
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            data['dimensionScores'][dim_key] = int(match.group(1))
-            
-            # Extract description for this dimension
-            desc_pattern = pattern + r'[^\n]*\n([^\n]+)'
-            desc_match = re.search(desc_pattern, content, re.IGNORECASE)
-            if desc_match:
-                data['dimensionDetails'][dim_key] = desc_match.group(2).strip()
+    # Extract dimension scores and descriptions
+    for dim_key, name in DIMENSION_PATTERNS.items():
+        budget.check('dimension scores')
+        score, detail = find_dimension(content, name, budget)
+        if score is not None:
+            report.dimension_scores.set(dim_key, score)
+            if detail is not None:
+                report.dimension_details.set(dim_key, detail)
     
     # Extract HIGH PRIORITY recommendations
-    high_section = re.search(r'HIGH PRIORITY\s*-+\s*(.+?)(?:MEDIUM PRIORITY|={3,}|$)', content, re.DOTALL | re.IGNORECASE)
-    if high_section:
-        recommendations = parse_recommendations_section(high_section.group(1))
-        data['recommendations']['high'] = recommendations
+    budget.check('high priority recommendations')
+    high_section = find_section(content, HIGH_PRIORITY_HEAD, HIGH_PRIORITY_END, to_end_of_text=True)
+    if high_section is not None:
+        report.high_priority = tuple(parse_recommendations_section(high_section, budget))
     
     # Extract MEDIUM PRIORITY recommendations
-    medium_section = re.search(r'MEDIUM PRIORITY\s*-+\s*(.+?)(?:={3,}|$)', content, re.DOTALL | re.IGNORECASE)
-    if medium_section:
-        recommendations = parse_recommendations_section(medium_section.group(1))
-        data['recommendations']['medium'] = recommendations
+    budget.check('medium priority recommendations')
+    medium_section = find_section(content, MEDIUM_PRIORITY_HEAD, MEDIUM_PRIORITY_END, to_end_of_text=True)
+    if medium_section is not None:
+        report.medium_priority = tuple(parse_recommendations_section(medium_section, budget))
     
-    return data
+    return report
 
-def parse_recommendations_section(section_text):
+def parse_recommendations_section(section_text, budget=None):
     """Parse individual recommendations with action items"""
+    budget = budget or ParseBudget()
     recommendations = []
     
-    # Split by numbered recommendations
-    rec_blocks = re.split(r'\n\s*\d+\.\s+', section_text)
+    # Split by numbered recommendations, skipping the text before the first one
+    rec_blocks = []
+    block_start = None
+    for separator in RECOMMENDATION_SPLIT.finditer(section_text):
+        if block_start is not None:
+            rec_blocks.append(section_text[block_start:separator.end(1)])
+        block_start = separator.end()
+    if block_start is not None:
+        rec_blocks.append(section_text[block_start:])
     
-    for block in rec_blocks[1:]:  # Skip first empty element
-        rec = {}
+    for block in rec_blocks:
+        budget.check('recommendations')
         lines = block.strip().split('\n')
         
         if lines:
             # First line is the title
-            title_match = re.match(r'(.+?)\s*\(([^)]+)\)', lines[0])
+            title_match = split_trailing_group(lines[0], '(', ')')
             if title_match:
-                rec['title'] = title_match.group(1).strip()
-                rec['dimension'] = title_match.group(2).strip()
+                title, dimension = title_match
             else:
-                rec['title'] = lines[0].strip()
-                rec['dimension'] = ''
+                title = lines[0].strip()
+                dimension = ''
             
             # Extract description (text before "Action Items:")
             desc_lines = []
@@ -104,93 +207,89 @@ def parse_recommendations_section(section_text):
                 
                 if in_actions:
                     # Extract numbered action items
-                    action_match = re.match(r'\d+\.\s*(.+)', line)
+                    action_match = re.match(r'\d++\.\s*(.+)', line)
                     if action_match:
                         action_items.append(action_match.group(1).strip())
                 else:
                     if line:
                         desc_lines.append(line)
             
-            rec['description'] = ' '.join(desc_lines)
-            rec['actionItems'] = action_items
-            
-            if rec.get('title'):
-                recommendations.append(rec)
+            if title:
+                recommendations.append(Recommendation(title, dimension, ' '.join(desc_lines), action_items))
     
     return recommendations
 
-def parse_toolbox_recommendations(content):
+def parse_toolbox_recommendations(content, budget=None):
     """Parse the MESH AI Toolbox Recommendations format"""
-    data = {
-        'readinessScore': 0,
-        'industry': '',
-        'companySize': '',
-        'budgetRange': '',
-        'implementationGuidance': '',
-        'recommendedTools': [],
-        'nextSteps': []
-    }
+    budget = budget or ParseBudget()
+    report = ToolboxReport()
     
     # Extract profile information
     profile_match = re.search(r'AI Readiness Score:\s*(\d+)', content)
     if profile_match:
-        data['readinessScore'] = int(profile_match.group(1))
+        report.readiness_score = int(profile_match.group(1))
     
     industry_match = re.search(r'Industry:\s*([^\n]+)', content, re.IGNORECASE)
     if industry_match:
-        data['industry'] = industry_match.group(1).strip()
+        report.industry = sys.intern(industry_match.group(1).strip())
     
     size_match = re.search(r'Company Size:\s*([^\n]+)', content, re.IGNORECASE)
     if size_match:
-        data['companySize'] = size_match.group(1).strip()
+        report.company_size = sys.intern(size_match.group(1).strip())
     
     budget_match = re.search(r'Budget:\s*([^\n$]+)', content, re.IGNORECASE)
     if budget_match:
-        data['budgetRange'] = budget_match.group(1).strip()
+        report.budget_range = sys.intern(budget_match.group(1).strip())
     
     # Extract implementation guidance
-    guidance_match = re.search(r'IMPLEMENTATION GUIDANCE\s*(.+?)(?:={3,})', content, re.DOTALL | re.IGNORECASE)
-    if guidance_match:
-        data['implementationGuidance'] = guidance_match.group(1).strip()
+    budget.check('implementation guidance')
+    guidance = find_section(content, GUIDANCE_HEAD, MEDIUM_PRIORITY_END)
+    if guidance is not None:
+        report.implementation_guidance = guidance.strip()
     
-    # Extract recommended tools
-    tools_section = re.search(r'RECOMMENDED TOOLS.*?\n\s*(.+?)(?:={3,}|BUDGET PLANNING|NEXT STEPS)', content, re.DOTALL | re.IGNORECASE)
-    if tools_section:
-        tools_text = tools_section.group(1)
-        
+    # Extract recommended tools: the section starts on the line after the heading
+    budget.check('recommended tools')
+    tools_text = None
+    tools_head = TOOLS_HEAD.search(content)
+    if tools_head:
+        line_end = content.find('\n', tools_head.end())
+        if line_end != -1:
+            start = LEADING_SPACE.match(content, line_end + 1).end()
+            tools_end = TOOLS_END.search(content, start + 1) if start < len(content) else None
+            if tools_end:
+                tools_text = content[start:tools_end.start()]
+    if tools_text is not None:
         # Split by numbered tools - use lookahead to keep the number
         tool_blocks = re.split(r'\n(?=\d+\.\s+)', tools_text)
+        tools = []
         
         for block in tool_blocks:
+            budget.check('recommended tools')
             block = block.strip()
             if block and re.match(r'\d+\.\s+', block):
                 # Remove the number prefix
                 block = re.sub(r'^\d+\.\s+', '', block)
                 tool = parse_tool_block(block)
                 if tool:
-                    data['recommendedTools'].append(tool)
+                    tools.append(tool)
+        report.recommended_tools = tuple(tools)
     
     # Extract next steps
-    next_steps_match = re.search(r'NEXT STEPS\s*(.+?)(?:={3,}|$)', content, re.DOTALL | re.IGNORECASE)
-    if next_steps_match:
-        steps_text = next_steps_match.group(1).strip()
-        steps = re.findall(r'\d+\.\s*([^\n]+)', steps_text)
-        data['nextSteps'] = [step.strip() for step in steps]
+    budget.check('next steps')
+    steps_text = find_section(content, NEXT_STEPS_HEAD, MEDIUM_PRIORITY_END, to_end_of_text=True)
+    if steps_text is not None:
+        steps = NUMBERED_STEP.findall(steps_text.strip())
+        report.next_steps = tuple(step.strip() for step in steps)
     
-    return data
+    return report
 
 def parse_tool_block(block):
     """Parse individual tool recommendation block"""
-    tool = {
-        'name': '',
-        'priority': '',
-        'matchScore': 0,
-        'category': '',
-        'website': '',
-        'whyRecommend': [],
-        'keyFeatures': [],
-        'pricing': []
-    }
+    name = priority = category = website = ''
+    match_score = 0
+    why_recommend = []
+    key_features = []
+    pricing = []
     
     lines = block.strip().split('\n')
     if not lines:
@@ -198,12 +297,11 @@ def parse_tool_block(block):
     
     # First line: Tool name and priority
     first_line = lines[0].strip()
-    name_match = re.match(r'(.+?)\s*\[([^\]]+)\]', first_line)
+    name_match = split_trailing_group(first_line, '[', ']')
     if name_match:
-        tool['name'] = name_match.group(1).strip()
-        tool['priority'] = name_match.group(2).strip()
+        name, priority = name_match
     else:
-        tool['name'] = first_line
+        name = first_line
     
     current_section = None
     
@@ -214,11 +312,11 @@ def parse_tool_block(block):
         if line.startswith('Match Score:'):
             match = re.search(r'(\d+)', line)
             if match:
-                tool['matchScore'] = int(match.group(1))
+                match_score = int(match.group(1))
         elif line.startswith('Category:'):
-            tool['category'] = line.replace('Category:', '').strip()
+            category = line.replace('Category:', '').strip()
         elif line.startswith('Website:'):
-            tool['website'] = line.replace('Website:', '').strip()
+            website = line.replace('Website:', '').strip()
         elif line.startswith('Why We Recommend:'):
             current_section = 'why'
         elif line.startswith('Key Features:'):
@@ -229,37 +327,146 @@ def parse_tool_block(block):
             # Bullet point
             item = line.replace('•', '').strip()
             if current_section == 'why':
-                tool['whyRecommend'].append(item)
+                why_recommend.append(item)
             elif current_section == 'features':
-                tool['keyFeatures'].append(item)
+                key_features.append(item)
             elif current_section == 'pricing':
-                tool['pricing'].append(item)
+                pricing.append(item)
         elif line and current_section == 'pricing' and ':' in line:
             # Pricing tier
-            tool['pricing'].append(line)
+            pricing.append(line)
     
-    return tool if tool['name'] else None
+    if not name:
+        return None
+    return Tool(name, priority, match_score, category, website, why_recommend, key_features, pricing)
+
+def detect_file_type(content):
+    """Guess whether content is a readiness report or a toolbox export"""
+    if 'AI READINESS ASSESSMENT' in content.upper():
+        return 'readiness'
+    elif 'MESH AI TOOLBOX' in content.upper() or 'RECOMMENDED TOOLS' in content.upper():
+        return 'toolbox'
+    else:
+        # Fallback: try both and see which gives better results
+        if 'Overall AI Readiness Score' in content or 'Maturity Level' in content:
+            return 'readiness'
+        else:
+            return 'toolbox'
+
+def parse_text_file(content, file_type='auto', max_chars=MAX_PARSE_CHARS, time_budget=PARSE_TIME_BUDGET):
+    """Main parser function that routes to appropriate parser.
 
-def parse_text_file(content, file_type='auto'):
-    """Main parser function that routes to appropriate parser"""
+    Returns a ReadinessReport or ToolboxReport record (see records.py).
+    Raises ValueError for a file_type other than 'readiness', 'toolbox' or
+    'auto', and ParseBudgetExceeded (a ValueError) if content is longer
+    than max_chars or parsing takes longer than time_budget seconds.
+    """
+    if len(content) > max_chars:
+        raise ParseBudgetExceeded(
+            f'Input is {len(content):,} characters; the parser accepts at most {max_chars:,}'
+        )
+    budget = ParseBudget(time_budget)
     
     # Try to detect file type if auto
     if file_type == 'auto':
-        if 'AI READINESS ASSESSMENT' in content.upper():
-            file_type = 'readiness'
-        elif 'MESH AI TOOLBOX' in content.upper() or 'RECOMMENDED TOOLS' in content.upper():
-            file_type = 'toolbox'
-        else:
-            # Fallback: try both and see which gives better results
-            if 'Overall AI Readiness Score' in content or 'Maturity Level' in content:
-                file_type = 'readiness'
-            else:
-                file_type = 'toolbox'
+        file_type = detect_file_type(content)
     
     if file_type == 'readiness':
-        return parse_readiness_assessment(content)
+        return parse_readiness_assessment(content, budget)
     elif file_type == 'toolbox':
-        return parse_toolbox_recommendations(content)
+        return parse_toolbox_recommendations(content, budget)
     else:
-        return {}
+        raise ValueError(f'Unknown file type: {file_type!r}')
+
+# ===== CORPUS PARSING CLI =====
+
+# Errors from unreadable paths and damaged or truncated archives
+CORPUS_READ_ERRORS = (OSError, EOFError, tarfile.TarError, zlib.error)
+
+def iter_corpus(paths, extension='.txt'):
+    """Yield (name, path, content, error) for every export under paths.
+
+    Plain files are yielded with content=None so workers read them
+    themselves; tar archive members are read here and yielded as bytes.
+    Paths and members that cannot be read are yielded with an error
+    message instead, so they are reported without stopping the run.
+    """
+    for path in paths:
+        try:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for filename in sorted(files):
+                        if filename.endswith(extension):
+                            file_path = os.path.join(root, filename)
+                            yield file_path, file_path, None, None
+            elif tarfile.is_tarfile(path):
+                yield from iter_archive(path, extension)
+            else:
+                yield path, path, None, None
+        except CORPUS_READ_ERRORS as e:
+            yield path, None, None, f'{type(e).__name__}: {e}'
+
+def iter_archive(path, extension):
+    with tarfile.open(path, 'r:*') as archive:
+        for member in archive:
+            if member.isfile() and member.name.endswith(extension):
+                content, error = None, None
+                try:
+                    content = archive.extractfile(member).read()
+                except CORPUS_READ_ERRORS as e:
+                    error = f'{type(e).__name__}: {e}'
+                yield f'{path}:{member.name}', None, content, error
+
+def parse_corpus_item(item):
+    """Parse one corpus entry into (ok, JSON line); runs in a worker process"""
+    name, path, content, error = item
+    if error is not None:
+        return False, json.dumps({'path': name, 'error': error}, ensure_ascii=False)
+    try:
+        if content is None:
+            with open(path, 'rb') as f:
+                content = f.read()
+        text = content.decode('utf-8')
+        file_type = detect_file_type(text)
+        record = {'path': name, 'type': file_type, 'data': parse_text_file(text, file_type).to_dict()}
+        ok = True
+    except Exception as e:
+        record = {'path': name, 'error': f'{type(e).__name__}: {e}'}
+        ok = False
+    return ok, json.dumps(record, ensure_ascii=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Parse readiness and toolbox .txt exports in parallel and emit JSONL'
+    )
+    parser.add_argument('paths', nargs='+', help='files, directories or tar archives to parse')
+    parser.add_argument('-o', '--output', default='-', help='JSONL output file (default: stdout)')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help='number of worker processes (default: all cores)')
+    parser.add_argument('--chunksize', type=int, default=64,
+                        help='documents handed to a worker at a time (default: 64)')
+    parser.add_argument('--extension', default='.txt', help='file extension to pick up (default: .txt)')
+    args = parser.parse_args(argv)
+    
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    parsed = failed = 0
+    try:
+        items = iter_corpus(args.paths, args.extension)
+        with Pool(args.workers) as pool:
+            for ok, line in pool.imap(parse_corpus_item, items, chunksize=args.chunksize):
+                out.write(line)
+                out.write('\n')
+                if ok:
+                    parsed += 1
+                else:
+                    failed += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    print(f'Parsed {parsed} documents, {failed} errors', file=sys.stderr)
+    return 1 if failed else 0
 
+if __name__ == '__main__':
+    sys.exit(main())